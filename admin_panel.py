@@ -1,12 +1,34 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_file
+from flask import (
+    Blueprint, render_template, request, redirect, url_for, flash, current_app, send_file, jsonify, Response,
+    stream_with_context, Request,
+)
 from flask_login import login_required, current_user
-import io
-import pandas as pd
+from werkzeug.exceptions import RequestEntityTooLarge
+import tempfile
+import time
 
-from models import Brand, PhoneModel, Sale
+from cache import bump_dataset_version
+from exporters import stream_csv, stream_columnar, write_xlsx, write_pdf
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin", template_folder="templates")
 
+# Upload modes that read the file in chunks instead of loading it whole
+STREAMED_MODES = ("stream", "background")
+
+
+class UploadRequest(Request):
+    """Request whose body limit is MAX_STREAM_UPLOAD_MB for streamed uploads.
+
+    The limit is checked before the form is parsed, so the upload form sends
+    its mode in the query string as well.
+    """
+
+    @property
+    def max_content_length(self) -> int | None:
+        if self.endpoint == "admin.upload" and self.args.get("mode") in STREAMED_MODES:
+            return current_app.config["MAX_STREAM_CONTENT_LENGTH"]
+        return super().max_content_length
+
 
 def require_admin() -> bool:
     return bool(current_user.is_authenticated and getattr(current_user, "role", "user") == "admin")
@@ -20,6 +42,36 @@ def guard_admin():
             return redirect(url_for("dashboard.index"))
 
 
+def _upload_stream(file):
+    """Chunked ingest that commits as it goes instead of loading the whole CSV"""
+    from ingest import IngestError, ingest_csv_stream, rows_per_second
+
+    def log_progress(rows: int, elapsed: float):
+        current_app.logger.info("Upload progress: %d rows, %.0f rows/sec", rows, rows_per_second(rows, elapsed))
+
+    SessionLocal = current_app.session_factory
+    started = time.perf_counter()
+    try:
+        with SessionLocal() as db:
+            rows = ingest_csv_stream(
+                db,
+                file.stream,
+                chunk_rows=current_app.config["UPLOAD_CHUNK_ROWS"],
+                chunk_size=current_app.config["INGEST_CHUNK_SIZE"],
+                on_progress=log_progress,
+            )
+    except IngestError as exc:
+        flash(str(exc), "danger")
+        return redirect(request.url)
+    finally:
+        bump_dataset_version(current_app.session_factory)
+        current_app.insight_store.refresh_async()
+    elapsed = time.perf_counter() - started
+    current_app.metrics.record_upload("stream", rows, elapsed)
+    flash(f"Uploaded {rows:,} rows ({rows_per_second(rows, elapsed):,.0f} rows/sec)", "success")
+    return redirect(url_for("dashboard.index"))
+
+
 @admin_bp.route("/upload", methods=["GET", "POST"])
 @login_required
 def upload():
@@ -29,70 +81,74 @@ def upload():
             flash("Please choose a CSV file", "warning")
             return redirect(request.url)
 
+        mode = request.args.get("mode") or request.form.get("mode")
+        if mode == "stream":
+            return _upload_stream(file)
+        if mode == "background":
+            job = current_app.job_queue.spool(file)
+            return jsonify({"job_id": job.id, "status_url": url_for("admin.job_status", job_id=job.id)}), 202
+
+        # pandas is imported on first use so workers that only serve the dashboard never load it
+        import pandas as pd
+
+        from ingest import REQUIRED_COLUMNS, ingest_dataframe
+
+        started = time.perf_counter()
         df = pd.read_csv(file)
-        required_cols = {
-            "Brand",
-            "Model",
-            "RAM",
-            "Storage",
-            "Camera",
-            "Battery",
-            "Processor",
-            "Price",
-            "Units Sold",
-            "Region",
-            "Channel",
-            "Year",
-        }
-        if not required_cols.issubset(set(df.columns)):
+        if not REQUIRED_COLUMNS.issubset(set(df.columns)):
             flash("CSV missing required columns", "danger")
             return redirect(request.url)
 
         SessionLocal = current_app.session_factory
         with SessionLocal() as db:
-            brand_cache = {b.name: b for b in db.query(Brand).all()}
-            for _, row in df.iterrows():
-                brand = brand_cache.get(row["Brand"]) or Brand(name=row["Brand"])
-                if brand.id is None:
-                    db.add(brand)
-                    db.flush()
-                    brand_cache[brand.name] = brand
-
-                model = (
-                    db.query(PhoneModel)
-                    .filter(PhoneModel.brand_id == brand.id, PhoneModel.model_name == row["Model"]).first()
-                )
-                if not model:
-                    model = PhoneModel(
-                        brand_id=brand.id,
-                        model_name=row["Model"],
-                        ram=row.get("RAM", ""),
-                        storage=row.get("Storage", ""),
-                        camera=row.get("Camera", ""),
-                        battery=row.get("Battery", ""),
-                        processor=row.get("Processor", ""),
-                        os=str(row.get("OS", "")),
-                        display_size=str(row.get("Display Size", "")),
-                        launch_year=int(row.get("Year", 0) or 0),
-                    )
-                    db.add(model)
-                    db.flush()
-
-                sale = Sale(
-                    model_id=model.id,
-                    units_sold=int(row.get("Units Sold", 0) or 0),
-                    total_revenue=float(row.get("Price", 0) or 0) * int(row.get("Units Sold", 0) or 0),
-                    average_price=float(str(row.get("Price", 0)).replace(",", "").replace("₹", "") or 0),
-                    region=row.get("Region", ""),
-                    channel=row.get("Channel", ""),
-                    year=int(row.get("Year", 0) or 0),
-                )
-                db.add(sale)
-
+            rows = ingest_dataframe(db, df, chunk_size=current_app.config["INGEST_CHUNK_SIZE"])
             db.commit()
+        current_app.metrics.record_upload("direct", rows, time.perf_counter() - started)
+        bump_dataset_version(current_app.session_factory)
+        current_app.insight_store.refresh_async()
         flash("Data uploaded successfully", "success")
         return redirect(url_for("dashboard.index"))
-    return render_template("admin_upload.html")
+    return render_template(
+        "admin_upload.html",
+        max_upload_mb=current_app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024),
+        max_stream_upload_mb=current_app.config["MAX_STREAM_CONTENT_LENGTH"] // (1024 * 1024),
+    )
+
+
+@admin_bp.errorhandler(RequestEntityTooLarge)
+def upload_too_large(exc):
+    limit_mb = (request.max_content_length or 0) // (1024 * 1024)
+    if request.args.get("mode") in STREAMED_MODES:
+        message = f"File is larger than the {limit_mb} MB limit for streamed uploads (MAX_STREAM_UPLOAD_MB)"
+    else:
+        message = (f"File is larger than the {limit_mb} MB limit for standard uploads (MAX_UPLOAD_MB); "
+                   "choose Stream or Background for large files")
+    if request.args.get("mode") == "background":
+        return jsonify({"error": message}), 413
+    flash(message, "danger")
+    return redirect(url_for("admin.upload"))
+
+
+@admin_bp.route("/jobs/<string:job_id>", methods=["GET"])
+@login_required
+def job_status(job_id: str):
+    job = current_app.job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@admin_bp.route("/cache", methods=["GET"])
+@login_required
+def cache_stats():
+    return jsonify({"api_data": current_app.response_cache.stats()})
+
+
+@admin_bp.route("/metrics", methods=["GET"])
+@login_required
+def metrics():
+    """Request, SQL, upload and cache metrics in the Prometheus text format"""
+    return Response(current_app.metrics.render(), content_type=current_app.metrics.content_type)
 
 
 @admin_bp.route("/export/<string:format>", methods=["GET"])
@@ -101,55 +157,34 @@ def export(format: str):
     if not require_admin():
         return redirect(url_for("dashboard.index"))
     SessionLocal = current_app.session_factory
-    with SessionLocal() as db:
-        query = (
-            db.query(
-                Brand.name.label("Brand"),
-                PhoneModel.model_name.label("Model"),
-                PhoneModel.ram.label("RAM"),
-                PhoneModel.storage.label("Storage"),
-                PhoneModel.camera.label("Camera"),
-                PhoneModel.battery.label("Battery"),
-                PhoneModel.processor.label("Processor"),
-                Sale.average_price.label("Price"),
-                Sale.units_sold.label("Units Sold"),
-                Sale.region.label("Region"),
-                Sale.channel.label("Channel"),
-                Sale.year.label("Year"),
-            )
-            .join(PhoneModel, PhoneModel.id == Sale.model_id)
-            .join(Brand, Brand.id == PhoneModel.brand_id)
+    if format == "csv":
+        body = stream_csv(SessionLocal, batch_size=current_app.config["EXPORT_BATCH_SIZE"])
+        return Response(
+            stream_with_context(body),
+            mimetype="text/csv",
+            headers={"Content-Disposition": "attachment; filename=sales_export.csv"},
         )
-        df = pd.read_sql(query.statement, db.bind)
 
-    if format == "csv":
-        buf = io.StringIO()
-        df.to_csv(buf, index=False)
-        buf.seek(0)
-        return send_file(io.BytesIO(buf.getvalue().encode()), as_attachment=True, download_name="sales_export.csv")
-    if format == "xlsx":
-        buf = io.BytesIO()
-        with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False)
+    if format in ("parquet", "arrow"):
+        try:
+            body = stream_columnar(SessionLocal, format, batch_size=current_app.config["EXPORT_BATCH_SIZE"])
+        except ImportError:
+            flash("Parquet/Arrow export requires pyarrow", "danger")
+            return redirect(url_for("admin.upload"))
+        mimetype = "application/vnd.apache.parquet" if format == "parquet" else "application/vnd.apache.arrow.file"
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=sales_export.{format}"},
+        )
+
+    if format in ("xlsx", "pdf"):
+        writer = write_xlsx if format == "xlsx" else write_pdf
+        # Build in a temp file on disk; send_file closes (and so deletes) it afterwards
+        buf = tempfile.TemporaryFile()
+        writer(SessionLocal, buf, batch_size=current_app.config["EXPORT_BATCH_SIZE"])
         buf.seek(0)
-        return send_file(buf, as_attachment=True, download_name="sales_export.xlsx")
-    if format == "pdf":
-        # Simple tabular PDF via pandas -> string; for production, create a rich PDF report
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-
-        pdf_buf = io.BytesIO()
-        c = canvas.Canvas(pdf_buf, pagesize=A4)
-        textobject = c.beginText(40, 800)
-        textobject.textLine("Mobile Sales Export")
-        textobject.textLine("")
-        for line in df.head(100).to_string(index=False).splitlines():
-            textobject.textLine(line[:95])
-        c.drawText(textobject)
-        c.showPage()
-        c.save()
-        pdf_buf.seek(0)
-        return send_file(pdf_buf, as_attachment=True, download_name="sales_export.pdf")
+        return send_file(buf, as_attachment=True, download_name=f"sales_export.{format}")
     return redirect(url_for("dashboard.index"))
 
 
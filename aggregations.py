@@ -0,0 +1,612 @@
+from sqlalchemy import Integer, cast, func, distinct
+from models import Brand, PhoneModel, Sale, BrandSalesRollup, ModelSalesRollup
+
+# Rollup tables and the dimensions they can filter and group by; anything
+# else (price ranges, per-sale points, distinct counts per model) reads sales
+ROLLUP_DIMENSIONS = [
+    (BrandSalesRollup, {"brand", "region", "year", "channel"}),
+    (ModelSalesRollup, {"brand", "model", "year"}),
+]
+
+POINT_MODES = ("exact", "bins", "sample")
+POINT_LAYOUTS = ("rows", "columns")
+DEFAULT_BINS = 40
+MAX_BINS = 200
+DEFAULT_SAMPLE_PER_BRAND = 200
+MAX_SAMPLE_PER_BRAND = 5000
+
+DEFAULT_MODEL_LIMIT = 20
+MAX_MODEL_LIMIT = 100
+
+# Top-K ranking of the model-level panels (top_models and treemap)
+RANK_METRICS = ("units", "revenue", "price")
+DEFAULT_TOP_MODELS = 50
+MAX_TOP_MODELS = 500
+DEFAULT_TREEMAP_MODELS = 10
+MAX_TREEMAP_MODELS = 100
+OTHER_MODELS = "Other"
+
+# Metrics in the specs-vs-sales correlation matrix, in display order
+CORRELATION_METRICS = ["ram", "storage", "price", "units_sold", "revenue"]
+
+# Fields of each scatter_data / correlation_data point
+SCATTER_FIELDS = ("x", "y", "brand", "model")
+CORRELATION_FIELDS = ("ram", "storage", "units_sold", "price", "revenue")
+
+# SQLite gained window functions in 3.25; other backends we run on have them
+WINDOW_FUNCTIONS_SQLITE = (3, 25)
+
+
+def supports_window_functions(db) -> bool:
+    dialect = db.connection().dialect
+    if dialect.name != "sqlite":
+        return True
+    return (dialect.server_version_info or (0,)) >= WINDOW_FUNCTIONS_SQLITE
+
+
+def parse_filters(args) -> dict:
+    """Normalize dashboard filter query parameters"""
+    filters = {
+        "brand": args.get("brand", ""),
+        "model": args.get("model", ""),
+        "channel": args.get("channel", ""),
+        "region": args.get("region", ""),
+        "year": None,
+        "price": None,
+    }
+
+    year_filter = args.get("year", "")
+    if year_filter:
+        try:
+            filters["year"] = int(year_filter)
+        except ValueError:
+            pass  # Invalid year filter, ignore it
+
+    price_filter = args.get("price", "")  # Format: "min-max"
+    if price_filter:
+        try:
+            if "-" in price_filter:
+                min_price, max_price = price_filter.split("-")
+                filters["price"] = (float(min_price), float(max_price))
+        except (ValueError, AttributeError):
+            pass  # Invalid price filter, ignore it
+
+    return filters
+
+
+def bounded_int(value, default: int, maximum: int) -> int:
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(number, 1), maximum)
+
+
+def parse_point_options(args) -> dict:
+    """Normalize the scatter/correlation reduction query parameters.
+
+    ``points`` is ``exact`` (one point per sale, the default), ``bins``
+    (``bins`` x ``bins`` histograms) or ``sample`` (at most ``sample``
+    points per brand). ``layout=columns`` sends point series as one array
+    per field instead of one object per point.
+    """
+    mode = args.get("points", "exact")
+    layout = args.get("layout", "rows")
+    return {
+        "mode": mode if mode in POINT_MODES else "exact",
+        "layout": layout if layout in POINT_LAYOUTS else "rows",
+        "bins": bounded_int(args.get("bins"), DEFAULT_BINS, MAX_BINS),
+        "sample": bounded_int(args.get("sample"), DEFAULT_SAMPLE_PER_BRAND, MAX_SAMPLE_PER_BRAND),
+    }
+
+
+def point_key(points: dict) -> tuple:
+    """Hashable key for parsed point options; sizes only count in the mode that uses them"""
+    mode = points["mode"]
+    layout = points["layout"] if mode != "bins" else None
+    return (mode, points["bins"] if mode == "bins" else None, points["sample"] if mode == "sample" else None, layout)
+
+
+def point_columns(data: dict) -> dict:
+    """Rewrite scatter_data / correlation_data in ``data`` as ``{field: [values]}``"""
+    for name, fields in (("scatter_data", SCATTER_FIELDS), ("correlation_data", CORRELATION_FIELDS)):
+        if name in data:
+            data[name] = {field: [point[field] for point in data[name]] for field in fields}
+    return data
+
+
+def parse_rank_options(args) -> dict:
+    """Normalize the top-K query parameters of the model-level panels.
+
+    ``sort`` ranks models by ``units`` (the default), ``revenue`` or average
+    ``price``. top_models returns ``limit`` models starting at ``offset``;
+    the treemap keeps ``treemap_limit`` models per brand and folds the rest
+    into an "Other" child.
+    """
+    sort = args.get("sort", "units")
+    try:
+        offset = max(int(args.get("offset", 0)), 0)
+    except (TypeError, ValueError):
+        offset = 0
+    return {
+        "sort": sort if sort in RANK_METRICS else "units",
+        "limit": bounded_int(args.get("limit"), DEFAULT_TOP_MODELS, MAX_TOP_MODELS),
+        "offset": offset,
+        "treemap_limit": bounded_int(args.get("treemap_limit"), DEFAULT_TREEMAP_MODELS, MAX_TREEMAP_MODELS),
+    }
+
+
+def rank_key(ranking: dict) -> tuple:
+    """Hashable key for parsed rank options"""
+    return (ranking["sort"], ranking["limit"], ranking["offset"], ranking["treemap_limit"])
+
+
+def filter_key(filters: dict) -> tuple:
+    """Hashable key for a parsed filter dict"""
+    return tuple(filters[name] for name in ("brand", "model", "channel", "region", "year", "price"))
+
+
+def fact_table(filters: dict, needs=()):
+    """Smallest table that can answer a panel: a rollup when the filters allow, else sales"""
+    required = {name for name, value in filters.items() if value not in ("", None)} | set(needs)
+    for rollup, dimensions in ROLLUP_DIMENSIONS:
+        if required <= dimensions:
+            return rollup
+    return Sale
+
+
+def apply_filters(query, filters: dict, fact=Sale):
+    """Apply parsed dashboard filters to a query over the joined sales (or rollup) tables"""
+    if filters["brand"]:
+        query = query.filter(Brand.name == filters["brand"])
+    if filters["model"]:
+        query = query.filter(PhoneModel.model_name == filters["model"])
+    if filters["channel"]:
+        query = query.filter(fact.channel == filters["channel"])
+    if filters["region"]:
+        query = query.filter(fact.region == filters["region"])
+    if filters["year"] is not None:
+        query = query.filter(fact.year == filters["year"])
+    if filters["price"] is not None:
+        min_price, max_price = filters["price"]
+        query = query.filter(Sale.average_price >= min_price, Sale.average_price <= max_price)
+    return query
+
+
+def sales_query(db, filters: dict, *columns, fact=Sale):
+    """Filtered fact/PhoneModel/Brand join selecting the given columns"""
+    query = db.query(*columns).select_from(fact)
+    if fact is BrandSalesRollup:
+        query = query.join(Brand, Brand.id == fact.brand_id)
+    else:
+        query = query.join(PhoneModel, PhoneModel.id == fact.model_id).join(Brand, Brand.id == PhoneModel.brand_id)
+    return apply_filters(query, filters, fact)
+
+
+def _units(fact=Sale):
+    return func.coalesce(func.sum(fact.units_sold), 0)
+
+
+def _revenue(fact=Sale):
+    return func.coalesce(func.sum(fact.total_revenue), 0)
+
+
+def kpis(db, filters: dict) -> dict:
+    fact = fact_table(filters, needs={"region"})
+    totals = sales_query(
+        db,
+        filters,
+        _units(fact).label("total_units"),
+        _revenue(fact).label("total_revenue"),
+        func.count(distinct(fact.region)).label("total_customers"),  # Approximate
+        fact=fact,
+    ).one()
+    model_pairs = (
+        sales_query(
+            db, filters, Brand.name, PhoneModel.model_name, fact=fact_table(filters, needs={"model"})
+        ).distinct().subquery()
+    )
+    total_models = db.query(func.count()).select_from(model_pairs).scalar()
+    return {
+        "total_units": totals.total_units,
+        "total_revenue": totals.total_revenue,
+        "total_models": total_models,
+        "total_customers": totals.total_customers,
+    }
+
+
+def brand_totals(db, filters: dict) -> tuple[dict, dict]:
+    fact = fact_table(filters, needs={"brand"})
+    rows = sales_query(
+        db, filters, Brand.name.label("brand"), _units(fact).label("units"), _revenue(fact).label("revenue"), fact=fact
+    ).group_by(Brand.name).order_by(Brand.name)
+    brand_sales = {}
+    brand_revenue = {}
+    for row in rows:
+        brand_sales[row.brand] = row.units
+        brand_revenue[row.brand] = row.revenue
+    return brand_sales, brand_revenue
+
+
+def channel_sales(db, filters: dict) -> dict:
+    fact = fact_table(filters, needs={"channel"})
+    rows = sales_query(
+        db, filters, fact.channel, _units(fact).label("units"), fact=fact
+    ).group_by(fact.channel).order_by(fact.channel)
+    return {row.channel: row.units for row in rows}
+
+
+def region_sales(db, filters: dict) -> dict:
+    fact = fact_table(filters, needs={"region"})
+    rows = sales_query(
+        db, filters, fact.region, _units(fact).label("units"), fact=fact
+    ).group_by(fact.region).order_by(fact.region)
+    return {row.region: row.units for row in rows}
+
+
+def yearly_trends(db, filters: dict) -> dict:
+    fact = fact_table(filters, needs={"year"})
+    rows = sales_query(
+        db, filters, fact.year, _units(fact).label("units"), _revenue(fact).label("revenue"), fact=fact
+    ).group_by(fact.year).order_by(fact.year)
+    return {row.year: {"units": row.units, "revenue": row.revenue} for row in rows}
+
+
+def heatmap(db, filters: dict) -> dict:
+    """Sales by region and year"""
+    fact = fact_table(filters, needs={"region", "year"})
+    rows = sales_query(
+        db, filters, fact.region, fact.year, _units(fact).label("units"), fact=fact
+    ).group_by(fact.region, fact.year).order_by(fact.region, fact.year)
+    return {
+        f"{row.region}_{row.year}": {"region": row.region, "year": row.year, "sales": row.units}
+        for row in rows
+    }
+
+
+def _rank_order(sort: str, units, revenue):
+    """ORDER BY for a model ranking: the metric descending, then brand and model name"""
+    if sort == "revenue":
+        metric = revenue
+    elif sort == "price":
+        metric = func.coalesce(revenue / func.nullif(units, 0), 0)
+    else:
+        metric = units
+    return metric.desc(), Brand.name, PhoneModel.model_name
+
+
+def treemap(db, filters: dict, ranking: dict | None = None) -> dict:
+    """Brand/Model hierarchy of units sold.
+
+    Each brand keeps its top ``treemap_limit`` models by the ranking metric;
+    the rest are summed into one "Other" child, so the payload is bounded by
+    the number of brands rather than models.
+    """
+    ranking = ranking or parse_rank_options({})
+    fact = fact_table(filters, needs={"brand", "model"})
+    units, revenue = _units(fact), _revenue(fact)
+    rows = sales_query(
+        db,
+        filters,
+        Brand.name.label("brand"),
+        PhoneModel.model_name.label("model"),
+        units.label("units"),
+        fact=fact,
+    ).group_by(Brand.name, PhoneModel.model_name).order_by(
+        Brand.name, *_rank_order(ranking["sort"], units, revenue)
+    )
+    treemap_data = {}
+    for row in rows.yield_per(10000):
+        if row.brand not in treemap_data:
+            treemap_data[row.brand] = {"name": row.brand, "value": 0, "children": {}}
+        brand = treemap_data[row.brand]
+        brand["value"] += row.units
+        children = brand["children"]
+        if len(children) < ranking["treemap_limit"]:
+            children[row.model] = {"name": row.model, "value": row.units}
+            continue
+        other = brand.setdefault("other", {"name": OTHER_MODELS, "value": 0, "models": 0})
+        other["value"] += row.units
+        other["models"] += 1
+    for brand in treemap_data.values():
+        if "other" in brand:
+            brand["children"][OTHER_MODELS] = brand.pop("other")
+    return treemap_data
+
+
+def top_models(db, filters: dict, ranking: dict | None = None) -> tuple[list[dict], int]:
+    """One page of models ranked by units, revenue or average price, and the number of matching models.
+
+    Region and channel counts are COUNT(DISTINCT) in the same GROUP BY, and
+    only ``limit`` rows from ``offset`` leave the database.
+    """
+    ranking = ranking or parse_rank_options({})
+    units, revenue = _units(), _revenue()
+    grouped = sales_query(
+        db,
+        filters,
+        Brand.name.label("brand"),
+        PhoneModel.model_name.label("model"),
+        units.label("units"),
+        revenue.label("revenue"),
+        func.count(distinct(Sale.region)).label("region_count"),
+        func.count(distinct(Sale.channel)).label("channel_count"),
+    ).group_by(Brand.name, PhoneModel.model_name)
+    rows = grouped.order_by(*_rank_order(ranking["sort"], units, revenue)).limit(ranking["limit"]).offset(
+        ranking["offset"]
+    )
+    total = db.query(func.count()).select_from(
+        sales_query(db, filters, Brand.name, PhoneModel.model_name).distinct().subquery()
+    ).scalar()
+    return [
+        {
+            "brand": row.brand,
+            "model": row.model,
+            "units_sold": row.units,
+            "total_revenue": row.revenue,
+            # Weighted average price
+            "avg_price": row.revenue / row.units if row.units > 0 else 0,
+            "region_count": row.region_count,
+            "channel_count": row.channel_count,
+        }
+        for row in rows
+    ], total
+
+
+def _point_metrics() -> dict:
+    return {
+        "ram": func.coalesce(PhoneModel.ram_gb, 0),
+        "storage": func.coalesce(PhoneModel.storage_gb, 0),
+        "price": Sale.average_price,
+        "units_sold": Sale.units_sold,
+        "revenue": Sale.total_revenue,
+    }
+
+
+def _point_columns():
+    metrics = _point_metrics()
+    return [
+        Brand.name.label("brand"),
+        PhoneModel.model_name.label("model"),
+        metrics["ram"].label("ram_gb"),
+        metrics["storage"].label("storage_gb"),
+        Sale.units_sold,
+        Sale.total_revenue,
+        Sale.average_price,
+    ]
+
+
+def _points(rows) -> tuple[list, list]:
+    scatter_data = []
+    correlation_data = []
+    for r in rows:
+        scatter_data.append({"x": r.average_price, "y": r.units_sold, "brand": r.brand, "model": r.model})
+        correlation_data.append({
+            "ram": r.ram_gb,
+            "storage": r.storage_gb,
+            "units_sold": r.units_sold,
+            "price": r.average_price,
+            "revenue": r.total_revenue,
+        })
+    return scatter_data, correlation_data
+
+
+def point_series(db, filters: dict) -> tuple[list, list]:
+    """Per-sale scatter (price vs units) and specs-vs-sales correlation points"""
+    return _points(sales_query(db, filters, *_point_columns()))
+
+
+def point_sample(db, filters: dict, per_brand: int) -> tuple[list, list]:
+    """Stratified sample of :func:`point_series`: at most ``per_brand`` sales per brand.
+
+    Sales are picked by a fixed hash of their id, so the same filters always
+    return the same points.
+    """
+    order = (Sale.id * 2654435761) % 4294967296
+    if supports_window_functions(db):
+        rank = func.row_number().over(partition_by=Brand.name, order_by=order).label("brand_rank")
+        ranked = sales_query(db, filters, *_point_columns(), rank).subquery()
+        rows = db.query(ranked).filter(ranked.c.brand_rank <= per_brand).order_by(ranked.c.brand, ranked.c.brand_rank)
+        return _points(rows)
+
+    taken = {}
+    rows = []
+    for row in sales_query(db, filters, *_point_columns()).order_by(Brand.name, order).yield_per(10000):
+        if taken.get(row.brand, 0) < per_brand:
+            taken[row.brand] = taken.get(row.brand, 0) + 1
+            rows.append(row)
+    return _points(rows)
+
+
+def _floor(db, expr):
+    # CAST truncates on SQLite, which is a floor for the non-negative offsets used here
+    if db.connection().dialect.name == "sqlite":
+        return cast(expr, Integer)
+    return cast(func.floor(expr), Integer)
+
+
+def histogram2d(db, filters: dict, x: str, y: str, bins: int) -> dict:
+    """Sale counts on a ``bins`` x ``bins`` grid spanning the filtered x/y ranges.
+
+    Only non-empty cells are returned, as ``[x_index, y_index, count]``.
+    """
+    metrics = _point_metrics()
+    x_col, y_col = metrics[x], metrics[y]
+    x_min, x_max, y_min, y_max = sales_query(
+        db, filters, func.min(x_col), func.max(x_col), func.min(y_col), func.max(y_col)
+    ).one()
+    if x_min is None:
+        return {"x": x, "y": y, "x_edges": [], "y_edges": [], "cells": []}
+
+    x_width = float(x_max - x_min) / bins or 1.0
+    y_width = float(y_max - y_min) / bins or 1.0
+    x_index = _floor(db, (x_col - x_min) / x_width)
+    y_index = _floor(db, (y_col - y_min) / y_width)
+    rows = sales_query(db, filters, x_index, y_index, func.count()).group_by(x_index, y_index)
+
+    counts = {}
+    for i, j, count in rows:
+        # The maximum lands on the far edge; fold it into the last bin
+        key = (min(i, bins - 1), min(j, bins - 1))
+        counts[key] = counts.get(key, 0) + count
+    return {
+        "x": x,
+        "y": y,
+        "x_edges": [x_min + k * x_width for k in range(bins + 1)],
+        "y_edges": [y_min + k * y_width for k in range(bins + 1)],
+        "cells": [[i, j, count] for (i, j), count in sorted(counts.items())],
+    }
+
+
+def correlation_matrix(db, filters: dict) -> dict:
+    """Pearson correlations between CORRELATION_METRICS without shipping any points.
+
+    Like the dashboard's client-side version, each pair only counts sales
+    where both values are positive. Sums are taken per model and per sign of
+    each sale metric; RAM and storage are fixed per model, so their terms are
+    folded in afterwards instead of being evaluated for every sale.
+    """
+    sale_metrics = {"price": Sale.average_price, "units_sold": Sale.units_sold, "revenue": Sale.total_revenue}
+    names = list(sale_metrics)
+    positive = [column > 0 for column in sale_metrics.values()]
+    values = [column * 1.0 for column in sale_metrics.values()]
+    products = [(i, j) for i in range(len(names)) for j in range(i, len(names))]
+    ram = func.coalesce(PhoneModel.ram_gb, 0)
+    storage = func.coalesce(PhoneModel.storage_gb, 0)
+    rows = sales_query(
+        db,
+        filters,
+        ram,
+        storage,
+        *positive,
+        func.count(),
+        *(func.sum(value) for value in values),
+        *(func.sum(values[i] * values[j]) for i, j in products),
+    ).group_by(PhoneModel.id, ram, storage, *positive)
+
+    pairs = [(a, b) for i, a in enumerate(CORRELATION_METRICS) for b in CORRELATION_METRICS[i + 1:]]
+    sums = {pair: [0.0] * 6 for pair in pairs}
+    for row in rows:
+        n = row[5]
+        model_values = {"ram": row[0], "storage": row[1]}
+        is_positive = {"ram": row[0] > 0, "storage": row[1] > 0, **dict(zip(names, row[2:5]))}
+        totals = dict(zip(names, row[6:9]))
+        sale_products = dict(zip([(names[i], names[j]) for i, j in products], row[9:]))
+
+        def total(name):
+            return model_values[name] * n if name in model_values else totals[name]
+
+        def product(a, b):
+            if a in model_values and b in model_values:
+                return model_values[a] * model_values[b] * n
+            if a in model_values:
+                return model_values[a] * totals[b]
+            if b in model_values:
+                return model_values[b] * totals[a]
+            return sale_products.get((a, b), sale_products.get((b, a)))
+
+        for a, b in pairs:
+            if is_positive[a] and is_positive[b]:
+                acc = sums[(a, b)]
+                for k, value in enumerate((n, total(a), total(b), product(a, a), product(b, b), product(a, b))):
+                    acc[k] += value
+
+    size = len(CORRELATION_METRICS)
+    matrix = [[1 if i == j else 0 for j in range(size)] for i in range(size)]
+    for (a, b), (n, sx, sy, sxx, syy, sxy) in sums.items():
+        denominator = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        r = (n * sxy - sx * sy) / denominator ** 0.5 if denominator > 0 else 0
+        i, j = CORRELATION_METRICS.index(a), CORRELATION_METRICS.index(b)
+        matrix[i][j] = matrix[j][i] = r
+    return {"metrics": CORRELATION_METRICS, "matrix": matrix}
+
+
+def filter_catalog(db) -> dict:
+    """Every filter value in the dataset, independent of the current filters.
+
+    Channels, regions and years come from SELECT DISTINCT over the brand
+    rollup, which is a few thousand rows whatever the size of sales. This is
+    also the ``filters`` panel; model names are left to the typeahead
+    (``model_options``) instead of a capped list.
+    """
+    def _distinct(column):
+        return [value for (value,) in db.query(column).distinct().order_by(column) if value]
+
+    return {
+        "brands": [name for (name,) in db.query(Brand.name).order_by(Brand.name)],
+        "channels": _distinct(BrandSalesRollup.channel),
+        "regions": _distinct(BrandSalesRollup.region),
+        "years": _distinct(BrandSalesRollup.year),
+    }
+
+
+def model_options(db, prefix: str = "", limit: int = DEFAULT_MODEL_LIMIT, brand: str = "") -> list[str]:
+    """Model names starting with ``prefix`` (case-insensitive) for typeahead, optionally for one brand.
+
+    The prefix is matched as a range on lower(model_name) so the
+    ix_phone_models_model_name_lower expression index serves it.
+    """
+    lowered = func.lower(PhoneModel.model_name)
+    query = db.query(PhoneModel.model_name, lowered).distinct()
+    if prefix:
+        prefix = prefix.lower()
+        query = query.filter(lowered >= prefix, lowered < prefix + "\U0010ffff")
+    if brand:
+        query = query.join(Brand, Brand.id == PhoneModel.brand_id).filter(Brand.name == brand)
+    return [name for name, _ in query.order_by(lowered, PhoneModel.model_name).limit(limit)]
+
+
+def scatter_panel(db, filters: dict, points: dict | None = None) -> dict:
+    """Scatter and correlation payload; ``points`` (see :func:`parse_point_options`) picks its size.
+
+    Reduced modes add a server-side ``correlation_matrix`` so the payload no
+    longer grows with the data.
+    """
+    mode = points["mode"] if points else "exact"
+    if mode == "exact":
+        scatter_data, correlation_data = point_series(db, filters)
+        data = {"scatter_data": scatter_data, "correlation_data": correlation_data}
+    else:
+        data = {"correlation_matrix": correlation_matrix(db, filters)}
+        if mode == "sample":
+            data["scatter_data"], data["correlation_data"] = point_sample(db, filters, points["sample"])
+        else:
+            data["scatter_bins"] = histogram2d(db, filters, "price", "units_sold", points["bins"])
+            data["correlation_bins"] = histogram2d(db, filters, "ram", "units_sold", points["bins"])
+    if points and points["layout"] == "columns":
+        point_columns(data)
+    return data
+
+
+# /api/<panel> payloads; each takes (db, filters, points, ranking) and
+# returns its slice of the /api/data payload
+PANELS = {
+    "kpis": lambda db, filters, points, ranking: {"kpis": kpis(db, filters)},
+    "brand_sales": lambda db, filters, points, ranking: dict(
+        zip(("brand_sales", "brand_revenue"), brand_totals(db, filters))
+    ),
+    "channel_sales": lambda db, filters, points, ranking: {"channel_sales": channel_sales(db, filters)},
+    "region_sales": lambda db, filters, points, ranking: {"region_sales": region_sales(db, filters)},
+    "yearly_trends": lambda db, filters, points, ranking: {"yearly_trends": yearly_trends(db, filters)},
+    "heatmap": lambda db, filters, points, ranking: {"heatmap_data": heatmap(db, filters)},
+    "treemap": lambda db, filters, points, ranking: {"treemap_data": treemap(db, filters, ranking)},
+    "top_models": lambda db, filters, points, ranking: dict(
+        zip(("top_models_data", "top_models_total"), top_models(db, filters, ranking))
+    ),
+    "scatter": lambda db, filters, points, ranking: scatter_panel(db, filters, points),
+    "filters": lambda db, filters, points, ranking: {"filters": filter_catalog(db)},
+}
+
+# Panels whose payload depends on the point options
+POINT_PANELS = {"scatter"}
+
+# Panels whose payload depends on the rank options
+RANK_PANELS = {"treemap", "top_models"}
+
+
+def dashboard_data(db, filters: dict, points: dict | None = None, ranking: dict | None = None) -> dict:
+    """Build the full /api/data payload: every panel in PANELS merged together"""
+    data = {}
+    for build in PANELS.values():
+        data.update(build(db, filters, points, ranking))
+    return data
@@ -1,13 +1,17 @@
-from flask import Flask
+import click
+from flask import Flask, request
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
 import os
 
+from cache import ResponseCache, UserCache, bump_dataset_version, bump_users_version, sync_dataset_version
 from config import get_config
-from models import Base, User
+from database import create_db_engine
+from insights import InsightStore
+from jobs import UploadJobQueue
+from metrics import AppMetrics
+from models import User
 
 
 def create_app() -> Flask:
@@ -17,40 +21,169 @@ def create_app() -> Flask:
     app.config.update(
         SECRET_KEY=cfg["SECRET_KEY"],
         SQLALCHEMY_DATABASE_URI=cfg["DATABASE_URI"],
-        MAX_CONTENT_LENGTH=32 * 1024 * 1024,
+        MAX_CONTENT_LENGTH=cfg["MAX_UPLOAD_MB"] * 1024 * 1024,
+        MAX_STREAM_CONTENT_LENGTH=cfg["MAX_STREAM_UPLOAD_MB"] * 1024 * 1024,
         PBI_REPORT_URL=cfg["PBI_REPORT_URL"],  # Add Power BI URL to Flask config
+        INGEST_CHUNK_SIZE=cfg["INGEST_CHUNK_SIZE"],
+        UPLOAD_CHUNK_ROWS=cfg["UPLOAD_CHUNK_ROWS"],
+        EXPORT_BATCH_SIZE=cfg["EXPORT_BATCH_SIZE"],
+        REPLICA_MAX_LAG_SECONDS=cfg["REPLICA_MAX_LAG_SECONDS"],
     )
 
-    engine = create_engine(cfg["DATABASE_URI"], future=True)
-    Base.metadata.create_all(engine)
+    metrics = AppMetrics(slow_query_ms=cfg["SLOW_QUERY_MS"], logger=app.logger)
+    metrics.instrument_app(app)
+
+    engine = create_db_engine(cfg["DATABASE_URI"], cfg)
+    metrics.instrument_engine(engine, "primary")
+    # No DDL here: the schema comes from `alembic upgrade head` or `flask init-db`
     SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False))
+    # Dashboard API reads go to the replica when one is configured
+    ReadSessionLocal = SessionLocal
+    if cfg["DATABASE_READ_URI"]:
+        read_engine = create_db_engine(cfg["DATABASE_READ_URI"], cfg)
+        metrics.instrument_engine(read_engine, "replica")
+        ReadSessionLocal = scoped_session(sessionmaker(bind=read_engine, autoflush=False, autocommit=False))
+
+    @app.before_request
+    def sync_version():
+        # Uploads handled by other workers bump the shared version; read it from the primary
+        if request.blueprint in ("dashboard", "insights"):
+            sync_dataset_version(SessionLocal, cfg["DATASET_VERSION_CHECK_SECONDS"])
 
     login_manager = LoginManager()
     login_manager.login_view = "auth.login"
     login_manager.init_app(app)
+    user_cache = UserCache(max_entries=cfg["USER_CACHE_MAX_ENTRIES"], ttl=cfg["USER_CACHE_TTL"])
 
     @login_manager.user_loader
     def load_user(user_id: str):
-        with SessionLocal() as db:
-            return db.get(User, int(user_id))
+        user_cache.sync(SessionLocal, cfg["USER_CACHE_CHECK_SECONDS"])  # Role changes made by any process
+        user = user_cache.get(int(user_id))
+        if user is None:
+            with SessionLocal() as db:
+                user = db.get(User, int(user_id))
+            if user is not None:
+                user_cache.set(user.id, user)  # Detached once the session closes
+        return user
 
     # Blueprints
     from auth import auth_bp
     from dashboard import dashboard_bp
-    from admin_panel import admin_bp
+    from admin_panel import UploadRequest, admin_bp
     from insights import insights_bp
 
+    app.request_class = UploadRequest
+
     # store db session factory on app
     app.session_factory = SessionLocal  # type: ignore[attr-defined]
+    app.read_session_factory = ReadSessionLocal  # type: ignore[attr-defined]
+    app.user_cache = user_cache  # type: ignore[attr-defined]
+    app.metrics = metrics  # type: ignore[attr-defined]
+    app.response_cache = ResponseCache(  # type: ignore[attr-defined]
+        max_entries=cfg["API_CACHE_MAX_ENTRIES"],
+        ttl=cfg["API_CACHE_TTL"],
+        max_bytes=cfg["API_CACHE_MAX_BYTES"],
+    )
+    # None unless ANALYTICS_ENGINE=columnar; dashboard panels then skip the database
+    app.columnar_store = None  # type: ignore[attr-defined]
+    if cfg["ANALYTICS_ENGINE"] == "columnar":
+        from columnar import ColumnarStore  # numpy/pandas only for workers that need them
+
+        app.columnar_store = ColumnarStore(SessionLocal)  # type: ignore[attr-defined]
+    # Both stores are rebuilt once per dataset version and kept until the next
+    # one, so they load from the primary: a lagging replica would pin
+    # pre-upload data under the new version until the next upload
+    app.insight_store = InsightStore(SessionLocal)  # type: ignore[attr-defined]
+    app.job_queue = UploadJobQueue(  # type: ignore[attr-defined]
+        SessionLocal,
+        spool_dir=cfg["UPLOAD_SPOOL_DIR"],
+        workers=cfg["UPLOAD_WORKERS"],
+        chunk_rows=cfg["UPLOAD_CHUNK_ROWS"],
+        chunk_size=cfg["INGEST_CHUNK_SIZE"],
+        after_ingest=app.insight_store.refresh_async,
+        metrics=metrics,
+    )
+
+    def cache_metrics():
+        stats = app.response_cache.stats()
+        return [
+            ("api_cache_hits_total", "counter", "Dashboard API response cache hits", stats["hits"]),
+            ("api_cache_misses_total", "counter", "Dashboard API response cache misses", stats["misses"]),
+            ("api_cache_evictions_total", "counter", "Responses evicted to stay within limits", stats["evictions"]),
+            ("api_cache_entries", "gauge", "Responses held in the cache", stats["entries"]),
+            ("api_cache_bytes", "gauge", "Bytes held in the response cache", stats["bytes"]),
+            ("user_cache_hits_total", "counter", "Logged-in users served from the user cache", user_cache.hits),
+            ("user_cache_misses_total", "counter", "Logged-in users loaded from the database", user_cache.misses),
+        ]
+
+    metrics.collectors.append(cache_metrics)
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(insights_bp)
 
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Upgrade the schema to the latest migration and backfill empty rollup tables."""
+        from alembic import command
+        from alembic.config import Config
+        from rollups import rebuild_rollups, rollups_stale
+
+        # Same as `alembic upgrade head`, so existing tables get new columns and the version is recorded
+        root = os.path.dirname(os.path.abspath(__file__))
+        alembic_cfg = Config(os.path.join(root, "alembic.ini"))
+        alembic_cfg.set_main_option("script_location", os.path.join(root, "migrations"))
+        alembic_cfg.set_main_option("sqlalchemy.url", cfg["DATABASE_URI"].replace("%", "%%"))
+        command.upgrade(alembic_cfg, "head")
+        with SessionLocal() as db:
+            # Databases created before the rollup tables existed need one backfill
+            if rollups_stale(db):
+                rebuild_rollups(db)
+                db.commit()
+        bump_dataset_version(SessionLocal)
+        click.echo("Database initialised")
+
+    @app.cli.command("rebuild-rollups")
+    def rebuild_rollups_command():
+        """Recompute the sales rollup tables from the raw sales table."""
+        from rollups import rebuild_rollups
+
+        with SessionLocal() as db:
+            rebuild_rollups(db)
+            db.commit()
+        bump_dataset_version(SessionLocal)
+        click.echo("Rollup tables rebuilt")
+
+    @app.cli.command("backfill-specs")
+    def backfill_specs_command():
+        """Re-parse every phone model's numeric spec columns from its text specs."""
+        from specs import backfill_spec_columns
+
+        with SessionLocal() as db:
+            updated = backfill_spec_columns(db)
+            db.commit()
+        bump_dataset_version(SessionLocal)
+        click.echo(f"Numeric specs updated for {updated} models")
+
+    @app.cli.command("set-role")
+    @click.argument("email")
+    @click.argument("role", type=click.Choice(["admin", "user"]))
+    def set_role_command(email: str, role: str):
+        """Give the user with EMAIL the admin or user role."""
+        with SessionLocal() as db:
+            user = db.query(User).filter(User.email == email.strip().lower()).first()
+            if user is None:
+                raise click.ClickException(f"No user with email {email}")
+            user.role = role
+            db.commit()
+            click.echo(f"{user.email} is now {role}")
+        bump_users_version(SessionLocal)  # Workers empty their user caches on their next check
+
     @app.teardown_appcontext
     def remove_session(exception=None):
         SessionLocal.remove()
+        ReadSessionLocal.remove()
 
     return app
 
@@ -44,6 +44,7 @@ def signup():
 @auth_bp.route("/logout")
 @login_required
 def logout():
+    current_app.user_cache.invalidate(current_user.id)
     logout_user()
     return redirect(url_for("auth.login"))
 
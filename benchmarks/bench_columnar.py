@@ -0,0 +1,68 @@
+"""Time the full /api/data payload from SQL and from the in-memory columnar store.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_columnar --rows 1000000
+
+Both engines build the same panels (scatter with ``points=bins``) for each
+filter combination; the columnar load time is reported separately.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import aggregations
+from benchmarks.bench_indexes import FILTER_COMBINATIONS
+from benchmarks.seed import seed_database
+from columnar import ColumnarStore
+
+POINTS = aggregations.parse_point_options({"points": "bins"})
+
+
+def best_of(repeat: int, build) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db-dir", default=tempfile.gettempdir(), help="where scratch SQLite databases are kept")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    uri = f"sqlite:///{os.path.join(os.path.abspath(args.db_dir), f'bench_{args.rows}.db')}"
+    SessionLocal = seed_database(uri, args.rows)
+
+    store = ColumnarStore(SessionLocal)
+    started = time.perf_counter()
+    store.table()
+    load_ms = round((time.perf_counter() - started) * 1000, 1)
+    print(f"columnar load: {load_ms:.1f} ms for {args.rows} rows")
+
+    sql, columnar = {}, {}
+    with SessionLocal() as db:
+        for combination in FILTER_COMBINATIONS:
+            filters = aggregations.parse_filters(combination)
+            key = "&".join(f"{k}={v}" for k, v in combination.items()) or "(none)"
+            sql[key] = best_of(args.repeat, lambda: aggregations.dashboard_data(db, filters, POINTS))
+            columnar[key] = best_of(args.repeat, lambda: store.dashboard_data(filters, POINTS))
+
+    print(f"{'filters':<32}{'sql ms':>12}{'columnar ms':>14}{'speedup':>10}")
+    for key in sql:
+        print(f"{key:<32}{sql[key]:>12.1f}{columnar[key]:>14.1f}{sql[key] / max(columnar[key], 0.1):>9.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"rows": args.rows, "load_ms": load_ms, "sql_ms": sql, "columnar_ms": columnar}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
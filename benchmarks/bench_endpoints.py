@@ -0,0 +1,209 @@
+"""Time the HTTP endpoints at several data sizes through the Flask test client.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_endpoints --rows 10000 100000 1000000 10000000 --output endpoints.json
+    python -m benchmarks.bench_endpoints --rows 100000 --compare endpoints.json
+
+Each endpoint runs in a fresh subprocess against a seeded scratch database
+and records wall time (best of ``--repeat``, response cache cleared before
+every request), SQL statements per request and response bytes per case, and
+the subprocess's peak RSS once per endpoint. The upload CSV is written to a
+file before its subprocess starts and posted from disk, so neither the
+generator nor the payload counts towards that RSS.
+``--uri-template`` points the suite at another database server; ``{name}``
+is replaced by the row count, or by ``<rows>_upload`` for the database the
+upload case loads into (its tables are dropped and recreated first).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_export import peak_rss_mb
+from benchmarks.bench_indexes import FILTER_COMBINATIONS
+
+ENDPOINTS = ["api_data", "panels", "insights", "upload", "export_csv", "export_parquet"]
+PANEL_NAMES = [
+    "kpis", "brand_sales", "channel_sales", "region_sales", "yearly_trends",
+    "heatmap", "treemap", "top_models", "scatter", "filters",
+]
+BENCH_EMAIL = "bench-admin@example.com"
+BENCH_PASSWORD = "bench"
+
+
+def _query(args: dict) -> str:
+    return "&".join(f"{key}={value}" for key, value in args.items())
+
+
+def _admin_client(app):
+    from werkzeug.security import generate_password_hash
+
+    from models import User
+
+    with app.session_factory() as db:
+        if db.query(User).filter(User.email == BENCH_EMAIL).first() is None:
+            db.add(User(email=BENCH_EMAIL, password_hash=generate_password_hash(BENCH_PASSWORD), role="admin"))
+            db.commit()
+    client = app.test_client()
+    client.post("/login", data={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    return client
+
+
+def write_upload_csv(rows: int, directory: str) -> str:
+    """Generate the upload payload chunk by chunk into a CSV file; returns its path"""
+    from generate_mobile_data import iter_sales_chunks, write_csv
+
+    path = os.path.join(directory, f"bench_upload_{rows}.csv")
+    if not os.path.exists(path):  # The generator is seeded, so an earlier file holds the same rows
+        write_csv(iter_sales_chunks(rows), path + ".tmp")
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def _requests(endpoint: str) -> list[tuple[str, str]]:
+    """(case name, URL) pairs an endpoint is timed on"""
+    if endpoint == "api_data":
+        return [(_query(args) or "(none)", "/api/data?" + _query({**args, "points": "bins"}))
+                for args in FILTER_COMBINATIONS]
+    if endpoint == "panels":
+        return [(f"{panel} {_query(args) or '(none)'}", f"/api/{panel}?" + _query({**args, "points": "bins"}))
+                for panel in PANEL_NAMES for args in FILTER_COMBINATIONS]
+    if endpoint == "insights":
+        return [("(none)", "/insights/api")]
+    if endpoint.startswith("export_"):
+        return [("(none)", f"/admin/export/{endpoint.split('_', 1)[1]}")]
+    return [("(none)", "/admin/upload")]
+
+
+def run_endpoint(uri: str, endpoint: str, repeat: int, payload: str | None = None) -> dict:
+    os.environ["DATABASE_URI"] = uri
+    os.environ.setdefault("UPLOAD_CHUNK_ROWS", "100000")
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from app import create_app
+    from insights import InsightStore
+    from models import Base
+
+    statements = [0]
+    event.listen(Engine, "before_cursor_execute", lambda *args: statements.__setitem__(0, statements[0] + 1))
+
+    app = create_app()
+    if endpoint == "upload":
+        Base.metadata.create_all(app.session_factory.get_bind())  # create_app leaves the schema alone
+    client = _admin_client(app)
+    results = []
+    for case, url in _requests(endpoint):
+        best, count, size = float("inf"), 0, 0
+        for _ in range(repeat):
+            app.response_cache.clear()
+            if endpoint == "insights":
+                app.insight_store = InsightStore(app.session_factory)  # The next read generates
+            if endpoint == "upload":
+                engine = app.session_factory.get_bind()
+                Base.metadata.drop_all(engine)
+                Base.metadata.create_all(engine)
+                client = _admin_client(app)
+            statements[0] = 0
+            started = time.perf_counter()
+            if endpoint == "upload":
+                # The test client spools large multipart bodies to a temp file rather than memory
+                with open(payload, "rb") as fh:
+                    response = client.post(url, data={"file": (fh, "bench.csv"), "mode": "stream"})
+                size = os.path.getsize(payload)
+            else:
+                response = client.get(url, buffered=False)
+                size = sum(len(chunk) for chunk in response.response)
+                response.close()
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                raise RuntimeError(f"{url} returned {response.status_code}")
+            if elapsed < best:
+                best, count = elapsed, statements[0]
+        results.append({
+            "endpoint": endpoint,
+            "case": case,
+            "ms": round(best * 1000, 1),
+            "statements": count,
+            "bytes": size,
+        })
+    return {"endpoint": endpoint, "peak_rss_mb": peak_rss_mb(), "cases": results}
+
+
+def _git_commit() -> str | None:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return proc.stdout.strip()
+
+
+def compare(results: list[dict], baseline_path: str) -> None:
+    with open(baseline_path) as fh:
+        baseline = {(r["rows"], r["endpoint"], r["case"]): r for r in json.load(fh)["results"]}
+    print(f"\n{'rows':>10}  {'endpoint':<16}{'case':<44}{'before ms':>11}{'after ms':>10}{'change':>9}")
+    for result in results:
+        before = baseline.get((result["rows"], result["endpoint"], result["case"]))
+        if before is None:
+            continue
+        change = result["ms"] / max(before["ms"], 0.1) - 1
+        print(f"{result['rows']:>10,}  {result['endpoint']:<16}{result['case'][:43]:<44}"
+              f"{before['ms']:>11.1f}{result['ms']:>10.1f}{change:>+9.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db-dir", default=tempfile.gettempdir(), help="where scratch SQLite databases are kept")
+    parser.add_argument("--uri-template", help="database URI with a {name} placeholder; defaults to SQLite in --db-dir")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="print the change against a previous --output file")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--uri", help=argparse.SUPPRESS)
+    parser.add_argument("--payload", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_endpoint(args.uri, args.run, args.repeat, args.payload)))
+        return
+
+    from benchmarks.seed import seed_database
+
+    template = args.uri_template or f"sqlite:///{os.path.join(os.path.abspath(args.db_dir), 'bench_{name}.db')}"
+    results, memory = [], []
+    for rows in args.rows:
+        uri = template.format(name=rows)
+        seed_database(uri, rows)
+        for endpoint in args.endpoints:
+            command = [sys.executable, "-m", "benchmarks.bench_endpoints", "--run", endpoint,
+                       "--repeat", str(args.repeat)]
+            if endpoint == "upload":
+                command += ["--uri", template.format(name=f"{rows}_upload"),
+                            "--payload", write_upload_csv(rows, args.db_dir)]
+            else:
+                command += ["--uri", uri]
+            proc = subprocess.run(command, capture_output=True, text=True, check=True)
+            run = json.loads(proc.stdout.splitlines()[-1])
+            for result in run["cases"]:
+                result = {"rows": rows, **result}
+                results.append(result)
+                print(f"{rows:>10,} rows  {endpoint:<16}{result['case'][:43]:<44}{result['ms']:>10.1f} ms"
+                      f"{result['statements']:>6} stmts")
+            memory.append({"rows": rows, "endpoint": endpoint, "peak_rss_mb": run["peak_rss_mb"]})
+            print(f"{rows:>10,} rows  {endpoint:<16}{'peak RSS':<44}{run['peak_rss_mb']:>10.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"commit": _git_commit(), "results": results, "memory": memory}, fh, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
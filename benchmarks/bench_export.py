@@ -0,0 +1,103 @@
+"""Time each export format and record its peak RSS.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_export --rows 100000 1000000
+
+Every format runs in a fresh subprocess so peak RSS is measured per export.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+FORMATS = ["csv", "parquet", "arrow", "xlsx", "pdf"]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB.
+
+    Prefers /proc's VmHWM: ru_maxrss survives exec on Linux and would report
+    the parent's peak for a freshly spawned subprocess.
+    """
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_export(uri: str, format: str, batch_size: int) -> dict:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from exporters import stream_csv, stream_columnar, write_pdf, write_xlsx
+
+    SessionLocal = sessionmaker(bind=create_engine(uri, future=True))
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as out:
+        if format == "csv":
+            for chunk in stream_csv(SessionLocal, batch_size):
+                out.write(chunk)
+        elif format in ("parquet", "arrow"):
+            for chunk in stream_columnar(SessionLocal, format, batch_size):
+                out.write(chunk)
+        elif format == "xlsx":
+            write_xlsx(SessionLocal, out, batch_size)
+        else:
+            write_pdf(SessionLocal, out, batch_size)
+        size = out.tell()
+    return {
+        "format": format,
+        "seconds": round(time.perf_counter() - started, 3),
+        "bytes": size,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--db-dir", default=tempfile.gettempdir(), help="where scratch SQLite databases are kept")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--uri", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_export(args.uri, args.run, args.batch_size)))
+        return
+
+    from benchmarks.seed import seed_database
+
+    results = []
+    for rows in args.rows:
+        uri = f"sqlite:///{os.path.join(os.path.abspath(args.db_dir), f'bench_{rows}.db')}"
+        seed_database(uri, rows)
+        for format in args.formats:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_export", "--run", format, "--uri", uri,
+                 "--batch-size", str(args.batch_size)],
+                capture_output=True, text=True, check=True,
+            )
+            result = {"rows": rows, **json.loads(proc.stdout)}
+            results.append(result)
+            print(f"{rows:>10,} rows  {format:<8} {result['seconds']:>8.2f}s  "
+                  f"{result['bytes'] / 1e6:>9.1f} MB  peak RSS {result['peak_rss_mb']:>7.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Time the dashboard aggregate queries with and without the filter indexes.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_indexes --rows 1000000
+
+The indexes declared on PhoneModel and Sale are dropped for the "before"
+run, then recreated and ANALYZEd for the "after" run.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+import aggregations
+from benchmarks.seed import seed_database
+from models import PhoneModel, Sale
+
+FILTER_COMBINATIONS = [
+    {},
+    {"brand": "Samsung"},
+    {"model": "SAM-110"},
+    {"region": "Delhi"},
+    {"year": "2024"},
+    {"channel": "Online", "region": "Karnataka"},
+    {"brand": "Apple", "year": "2023"},
+    {"price": "20000-30000"},
+]
+
+PANELS = [
+    aggregations.kpis,
+    aggregations.brand_totals,
+    aggregations.channel_sales,
+    aggregations.region_sales,
+    aggregations.yearly_trends,
+    aggregations.heatmap,
+    aggregations.treemap,
+    aggregations.top_models,
+    lambda db, filters: aggregations.filter_catalog(db),
+]
+
+INDEXES = list(PhoneModel.__table__.indexes) + list(Sale.__table__.indexes)
+
+
+def time_panels(SessionLocal, repeat: int) -> dict:
+    timings = {}
+    with SessionLocal() as db:
+        for args in FILTER_COMBINATIONS:
+            filters = aggregations.parse_filters(args)
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for panel in PANELS:
+                    panel(db, filters)
+                best = min(best, time.perf_counter() - started)
+            timings["&".join(f"{k}={v}" for k, v in args.items()) or "(none)"] = round(best * 1000, 1)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db-dir", default=tempfile.gettempdir(), help="where scratch SQLite databases are kept")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    uri = f"sqlite:///{os.path.join(os.path.abspath(args.db_dir), f'bench_{args.rows}.db')}"
+    SessionLocal = seed_database(uri, args.rows)
+    engine = SessionLocal.kw["bind"]
+
+    # IF [NOT] EXISTS rather than checkfirst: SQLite doesn't reflect expression
+    # indexes such as lower(model_name), so checkfirst can't see them
+    with engine.begin() as conn:
+        for index in INDEXES:
+            conn.execute(DropIndex(index, if_exists=True))
+    before = time_panels(SessionLocal, args.repeat)
+
+    with engine.begin() as conn:
+        for index in INDEXES:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+        conn.execute(text("ANALYZE"))
+    after = time_panels(SessionLocal, args.repeat)
+
+    print(f"{'filters':<32}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for key in before:
+        print(f"{key:<32}{before[key]:>12.1f}{after[key]:>12.1f}{before[key] / max(after[key], 0.1):>9.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"rows": args.rows, "before_ms": before, "after_ms": after}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
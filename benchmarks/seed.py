@@ -0,0 +1,33 @@
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from generate_mobile_data import iter_sales_chunks
+from ingest import ingest_dataframe
+from models import Base, Sale
+from rollups import rebuild_rollups, rollups_stale
+
+
+def seed_database(uri: str, rows: int, chunk_rows: int = 100000) -> sessionmaker:
+    """Fill a scratch database with ``rows`` sales and return a session factory.
+
+    Rows come from ``generate_mobile_data.iter_sales_chunks`` with a fixed
+    seed and are loaded through the normal ingest path. A database that
+    already holds ``rows`` sales is reused as is.
+    """
+    engine = create_engine(uri, future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    with SessionLocal() as db:
+        existing = db.scalar(select(func.count()).select_from(Sale))
+        if existing == rows:
+            if rollups_stale(db):
+                rebuild_rollups(db)
+                db.commit()
+            return SessionLocal
+        if existing:
+            raise ValueError(f"{uri} already holds {existing} sales; use an empty database")
+
+        for chunk in iter_sales_chunks(rows, chunk_rows):
+            ingest_dataframe(db, chunk)
+            db.commit()
+    return SessionLocal
@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select, update
+
+from models import DatasetState
+
+# The dataset version lives in the one-row dataset_state table, bumped after
+# every upload commits. Each worker process copies it into _dataset_version
+# (see sync_dataset_version), which everything derived from the data
+# compares against.
+_dataset_version = 0
+_adopted_at = float("-inf")  # When this process moved to the current version
+_checked_at = float("-inf")
+_version_lock = threading.Lock()
+
+
+def dataset_version() -> int:
+    return _dataset_version
+
+
+def version_age() -> float:
+    """Seconds since this process picked up the current dataset version"""
+    return time.monotonic() - _adopted_at
+
+
+def _adopt(version: int) -> int:
+    global _dataset_version, _adopted_at
+    with _version_lock:
+        if version > _dataset_version:
+            _dataset_version = version
+            _adopted_at = time.monotonic()
+        return _dataset_version
+
+
+def read_dataset_version(db) -> int:
+    return db.scalar(select(DatasetState.version).where(DatasetState.id == 1)) or 0
+
+
+def read_users_version(db) -> int:
+    return db.scalar(select(DatasetState.users_version).where(DatasetState.id == 1)) or 0
+
+
+def _bump(session_factory, column) -> int:
+    with session_factory() as db:
+        updated = db.execute(update(DatasetState).where(DatasetState.id == 1).values({column: column + 1})).rowcount
+        if not updated:  # Tables made by create_all start without the row
+            db.add(DatasetState(id=1, version=0, users_version=0, **{column.key: 1}))
+            db.flush()
+        version = db.scalar(select(column).where(DatasetState.id == 1))
+        db.commit()
+    return version
+
+
+def bump_dataset_version(session_factory) -> int:
+    """Advance the shared dataset version after an upload commits and adopt it here.
+
+    Call it with the primary's session factory: a replica would hand back a
+    version that other workers may not see yet.
+    """
+    return _adopt(_bump(session_factory, DatasetState.version))
+
+
+def bump_users_version(session_factory) -> int:
+    """Advance the shared users version after a user's role changes, so every UserCache drops its entries"""
+    return _bump(session_factory, DatasetState.users_version)
+
+
+def sync_dataset_version(session_factory, interval: float = 1.0) -> int:
+    """Pick up versions bumped by other processes, reading the database at most every ``interval`` seconds"""
+    global _checked_at
+    now = time.monotonic()
+    if now - _checked_at < interval:
+        return _dataset_version
+    _checked_at = now
+    with session_factory() as db:
+        version = read_dataset_version(db)
+    return _adopt(version)
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of serialized responses with TTL and a byte ceiling.
+
+    Entries are tied to the dataset version they were built against; the whole
+    cache is dropped the first time it is touched after the version changes.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._version = dataset_version()
+        self._lock = threading.Lock()
+
+    def _check_version(self) -> None:
+        version = dataset_version()
+        if version != self._version:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def _evict(self, key) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def get(self, key):
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._evict(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value: bytes, version: int | None = None, ttl: float | None = None) -> None:
+        """Store ``value``; pass the dataset version read before building it.
+
+        A body built from data older than the current version (an upload
+        committed while it was being built) is dropped instead of cached.
+        ``ttl`` shortens the entry's lifetime below the cache default.
+        """
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version()
+            if version is not None and version != self._version:
+                return
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (time.monotonic() + min(self.ttl, ttl if ttl is not None else self.ttl), value)
+            self._bytes += len(value)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._evict(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "dataset_version": self._version,
+            }
+
+
+class UserCache:
+    """Thread-safe LRU of loaded users with a TTL, so login_required skips the database.
+
+    Logout drops the user's entry in this process. Role changes bump the
+    users version in dataset_state; ``sync`` reads it at most once per
+    interval and empties the cache when another process has moved it.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._checked_at = float("-inf")
+
+    def sync(self, session_factory, interval: float = 1.0) -> None:
+        """Drop every entry once the shared users version has moved, reading it at most every ``interval`` seconds"""
+        now = time.monotonic()
+        if now - self._checked_at < interval:
+            return
+        self._checked_at = now
+        with session_factory() as db:
+            version = read_users_version(db)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+    def get(self, user_id: int):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id: int, user) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
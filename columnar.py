@@ -0,0 +1,390 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+
+from aggregations import CORRELATION_METRICS, OTHER_MODELS, parse_rank_options, point_columns
+from cache import dataset_version
+from models import Brand, PhoneModel, Sale
+
+
+def _sorted_codes(values: pd.Series) -> tuple[np.ndarray, list]:
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int32), uniques.tolist()
+
+
+class ColumnarTable:
+    """The joined sales fact table as NumPy columns, one entry per sale.
+
+    Brand, model, region, channel and year are int codes into sorted value
+    lists, so every group-by is an ``np.bincount`` and every filter a boolean
+    mask. Models are numbered in (brand name, model name) order, which is the
+    order the SQL panels return them in. NULL regions, channels and years are
+    read as ""/0, as in the rollup tables.
+    """
+
+    def __init__(self, brands: pd.DataFrame, models: pd.DataFrame, sales: pd.DataFrame):
+        self.brand_names = brands["name"].tolist()
+        brand_codes = {brand_id: code for code, brand_id in enumerate(brands["id"])}
+
+        models = models.assign(brand_code=models["brand_id"].map(brand_codes))
+        models = models.sort_values(["brand_code", "model_name"], ignore_index=True)
+        self.model_names = models["model_name"].tolist()
+        self.model_brand = models["brand_code"].to_numpy(np.int32)
+
+        self.size = len(sales)
+        self.ids = sales["id"].to_numpy(np.int64)
+        self.model = pd.Index(models["id"]).get_indexer(sales["model_id"]).astype(np.int32)
+        self.brand = self.model_brand[self.model]
+        self.region, self.regions = _sorted_codes(sales["region"])
+        self.channel, self.channels = _sorted_codes(sales["channel"])
+        self.year, self.years = _sorted_codes(sales["year"])
+        self.units = sales["units_sold"].to_numpy(np.int64)
+        self.revenue = sales["total_revenue"].to_numpy(np.float64)
+        self.price = sales["average_price"].to_numpy(np.float64)  # NaN where NULL
+        self.ram = models["ram_gb"].to_numpy(np.int64)[self.model]
+        self.storage = models["storage_gb"].to_numpy(np.int64)[self.model]
+
+    @classmethod
+    def load(cls, db) -> "ColumnarTable":
+        brands = pd.DataFrame(db.query(Brand.id, Brand.name).order_by(Brand.name).all(), columns=["id", "name"])
+        models = pd.DataFrame(
+            db.query(
+                PhoneModel.id,
+                PhoneModel.brand_id,
+                PhoneModel.model_name,
+                func.coalesce(PhoneModel.ram_gb, 0),
+                func.coalesce(PhoneModel.storage_gb, 0),
+            ).all(),
+            columns=["id", "brand_id", "model_name", "ram_gb", "storage_gb"],
+        )
+        sales = pd.read_sql(
+            select(
+                Sale.id,
+                Sale.model_id,
+                func.coalesce(Sale.region, "").label("region"),
+                func.coalesce(Sale.channel, "").label("channel"),
+                func.coalesce(Sale.year, 0).label("year"),
+                func.coalesce(Sale.units_sold, 0).label("units_sold"),
+                func.coalesce(Sale.total_revenue, 0.0).label("total_revenue"),
+                Sale.average_price,
+            ).order_by(Sale.id),
+            db.connection(),
+        )
+        return cls(brands, models, sales)
+
+    def select(self, filters: dict):
+        """Row selector for parsed dashboard filters: a slice when unfiltered, else an index array"""
+        keep = None
+
+        def narrow(mask):
+            nonlocal keep
+            keep = mask if keep is None else keep & mask
+
+        def code_of(values: list, value):
+            try:
+                return values.index(value)
+            except ValueError:
+                return -1
+
+        if filters["brand"]:
+            narrow(self.brand == code_of(self.brand_names, filters["brand"]))
+        if filters["model"]:
+            matches = np.array([name == filters["model"] for name in self.model_names], dtype=bool)
+            narrow(matches[self.model])
+        if filters["channel"]:
+            narrow(self.channel == code_of(self.channels, filters["channel"]))
+        if filters["region"]:
+            narrow(self.region == code_of(self.regions, filters["region"]))
+        if filters["year"] is not None:
+            narrow(self.year == code_of(self.years, filters["year"]))
+        if filters["price"] is not None:
+            min_price, max_price = filters["price"]
+            narrow((self.price >= min_price) & (self.price <= max_price))
+        return slice(None) if keep is None else np.flatnonzero(keep)
+
+    def _sums(self, codes: np.ndarray, rows, size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per-code sale count, units and revenue over the selected rows"""
+        codes = codes[rows]
+        counts = np.bincount(codes, minlength=size)
+        units = np.bincount(codes, weights=self.units[rows], minlength=size).astype(np.int64)
+        revenue = np.bincount(codes, weights=self.revenue[rows], minlength=size)
+        return counts, units, revenue
+
+    def _distinct_per_model(self, codes: np.ndarray, values: list, rows) -> np.ndarray:
+        pairs = self.model[rows].astype(np.int64) * len(values) + codes[rows]
+        seen = np.bincount(pairs, minlength=len(self.model_names) * len(values)) > 0
+        return seen.reshape(len(self.model_names), len(values)).sum(axis=1)
+
+    def kpis(self, filters: dict) -> dict:
+        rows = self.select(filters)
+        units = self.units[rows]
+        if not len(units):
+            return {"total_units": 0, "total_revenue": 0, "total_models": 0, "total_customers": 0}
+        return {
+            "total_units": int(units.sum()),
+            "total_revenue": float(self.revenue[rows].sum()),
+            "total_models": int(np.count_nonzero(np.bincount(self.model[rows], minlength=len(self.model_names)))),
+            "total_customers": int(np.count_nonzero(np.bincount(self.region[rows], minlength=len(self.regions)))),
+        }
+
+    def brand_totals(self, filters: dict) -> tuple[dict, dict]:
+        counts, units, revenue = self._sums(self.brand, self.select(filters), len(self.brand_names))
+        present = np.flatnonzero(counts)
+        brand_sales = {self.brand_names[code]: int(units[code]) for code in present}
+        brand_revenue = {self.brand_names[code]: float(revenue[code]) for code in present}
+        return brand_sales, brand_revenue
+
+    def _units_by(self, codes: np.ndarray, values: list, filters: dict) -> dict:
+        counts, units, _ = self._sums(codes, self.select(filters), len(values))
+        return {values[code]: int(units[code]) for code in np.flatnonzero(counts)}
+
+    def channel_sales(self, filters: dict) -> dict:
+        return self._units_by(self.channel, self.channels, filters)
+
+    def region_sales(self, filters: dict) -> dict:
+        return self._units_by(self.region, self.regions, filters)
+
+    def yearly_trends(self, filters: dict) -> dict:
+        counts, units, revenue = self._sums(self.year, self.select(filters), len(self.years))
+        return {
+            self.years[code]: {"units": int(units[code]), "revenue": float(revenue[code])}
+            for code in np.flatnonzero(counts)
+        }
+
+    def heatmap(self, filters: dict) -> dict:
+        cells = self.region.astype(np.int64) * len(self.years) + self.year
+        counts, units, _ = self._sums(cells, self.select(filters), len(self.regions) * len(self.years))
+        data = {}
+        for cell in np.flatnonzero(counts):
+            region, year = self.regions[cell // len(self.years)], self.years[cell % len(self.years)]
+            data[f"{region}_{year}"] = {"region": region, "year": year, "sales": int(units[cell])}
+        return data
+
+    @staticmethod
+    def _ranked(codes: np.ndarray, sort: str, units: np.ndarray, revenue: np.ndarray) -> np.ndarray:
+        """Model codes by the ranking metric descending; ties keep (brand, model) name order"""
+        if sort == "revenue":
+            metric = revenue[codes]
+        elif sort == "price":
+            metric = np.divide(revenue[codes], units[codes], out=np.zeros(len(codes)), where=units[codes] > 0)
+        else:
+            metric = units[codes]
+        return codes[np.lexsort((codes, -metric))]
+
+    def treemap(self, filters: dict, ranking: dict | None = None) -> dict:
+        """Same hierarchy as :func:`aggregations.treemap`, with the same "Other" children"""
+        ranking = ranking or parse_rank_options({})
+        counts, units, revenue = self._sums(self.model, self.select(filters), len(self.model_names))
+        present = self._ranked(np.flatnonzero(counts), ranking["sort"], units, revenue)
+        present = present[np.argsort(self.model_brand[present], kind="stable")]
+        brands = self.model_brand[present]
+        starts = np.flatnonzero(np.r_[True, brands[1:] != brands[:-1]])
+        rank = np.arange(len(present)) - np.repeat(starts, np.diff(np.r_[starts, len(present)]))
+
+        treemap_data = {}
+        brand_units = np.bincount(brands, weights=units[present], minlength=len(self.brand_names)).astype(np.int64)
+        for code in np.unique(brands):
+            brand = self.brand_names[code]
+            treemap_data[brand] = {"name": brand, "value": int(brand_units[code]), "children": {}}
+        for code in present[rank < ranking["treemap_limit"]]:
+            brand, model = self.brand_names[self.model_brand[code]], self.model_names[code]
+            treemap_data[brand]["children"][model] = {"name": model, "value": int(units[code])}
+        tail = present[rank >= ranking["treemap_limit"]]
+        tail_units = np.bincount(self.model_brand[tail], weights=units[tail], minlength=len(self.brand_names))
+        tail_models = np.bincount(self.model_brand[tail], minlength=len(self.brand_names))
+        for code in np.flatnonzero(tail_models):
+            treemap_data[self.brand_names[code]]["children"][OTHER_MODELS] = {
+                "name": OTHER_MODELS,
+                "value": int(tail_units[code]),
+                "models": int(tail_models[code]),
+            }
+        return treemap_data
+
+    def top_models(self, filters: dict, ranking: dict | None = None) -> tuple[list[dict], int]:
+        """Same page and total as :func:`aggregations.top_models`"""
+        ranking = ranking or parse_rank_options({})
+        rows = self.select(filters)
+        counts, units, revenue = self._sums(self.model, rows, len(self.model_names))
+        present = np.flatnonzero(counts)
+        page = self._ranked(present, ranking["sort"], units, revenue)
+        page = page[ranking["offset"]:ranking["offset"] + ranking["limit"]]
+        region_counts = self._distinct_per_model(self.region, self.regions, rows)
+        channel_counts = self._distinct_per_model(self.channel, self.channels, rows)
+        return [
+            {
+                "brand": self.brand_names[self.model_brand[code]],
+                "model": self.model_names[code],
+                "units_sold": int(units[code]),
+                "total_revenue": float(revenue[code]),
+                # Weighted average price
+                "avg_price": float(revenue[code]) / int(units[code]) if units[code] > 0 else 0,
+                "region_count": int(region_counts[code]),
+                "channel_count": int(channel_counts[code]),
+            }
+            for code in page
+        ], len(present)
+
+    def _points(self, rows) -> tuple[list, list]:
+        models = self.model[rows]
+        brands = [self.brand_names[code] for code in self.model_brand[models]]
+        names = [self.model_names[code] for code in models]
+        prices = [None if price != price else price for price in self.price[rows].tolist()]
+        units = self.units[rows].tolist()
+        revenue = self.revenue[rows].tolist()
+        ram = self.ram[rows].tolist()
+        storage = self.storage[rows].tolist()
+        scatter_data = [
+            {"x": x, "y": y, "brand": brand, "model": model} for x, y, brand, model in zip(prices, units, brands, names)
+        ]
+        correlation_data = [
+            {"ram": r, "storage": s, "units_sold": u, "price": p, "revenue": v}
+            for r, s, u, p, v in zip(ram, storage, units, prices, revenue)
+        ]
+        return scatter_data, correlation_data
+
+    def point_sample(self, filters: dict, per_brand: int) -> tuple[list, list]:
+        """Same sales as :func:`aggregations.point_sample`: the first ``per_brand`` per brand by id hash"""
+        rows = np.arange(self.size)[self.select(filters)]
+        order = (self.ids[rows] * 2654435761) % 4294967296
+        rows = rows[np.lexsort((order, self.brand[rows]))]
+        brands = self.brand[rows]
+        starts = np.flatnonzero(np.r_[True, brands[1:] != brands[:-1]])
+        rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        return self._points(rows[rank < per_brand])
+
+    def _metric(self, name: str) -> np.ndarray:
+        return {
+            "ram": self.ram,
+            "storage": self.storage,
+            "price": self.price,
+            "units_sold": self.units,
+            "revenue": self.revenue,
+        }[name]
+
+    def histogram2d(self, filters: dict, x: str, y: str, bins: int) -> dict:
+        """Same grid as :func:`aggregations.histogram2d`"""
+        rows = self.select(filters)
+        x_values, y_values = self._metric(x)[rows], self._metric(y)[rows]
+        known = ~(pd.isna(x_values) | pd.isna(y_values))
+        x_values, y_values = x_values[known], y_values[known]
+        if not len(x_values):
+            return {"x": x, "y": y, "x_edges": [], "y_edges": [], "cells": []}
+
+        x_min, x_max = x_values.min().item(), x_values.max().item()
+        y_min, y_max = y_values.min().item(), y_values.max().item()
+        x_width = float(x_max - x_min) / bins or 1.0
+        y_width = float(y_max - y_min) / bins or 1.0
+        # The maximum lands on the far edge; fold it into the last bin
+        x_index = np.minimum(((x_values - x_min) / x_width).astype(np.int64), bins - 1)
+        y_index = np.minimum(((y_values - y_min) / y_width).astype(np.int64), bins - 1)
+        counts = np.bincount(x_index * bins + y_index, minlength=bins * bins)
+        return {
+            "x": x,
+            "y": y,
+            "x_edges": [x_min + k * x_width for k in range(bins + 1)],
+            "y_edges": [y_min + k * y_width for k in range(bins + 1)],
+            "cells": [[int(cell // bins), int(cell % bins), int(counts[cell])] for cell in np.flatnonzero(counts)],
+        }
+
+    def correlation_matrix(self, filters: dict) -> dict:
+        """Same matrix as :func:`aggregations.correlation_matrix`"""
+        rows = self.select(filters)
+        values = {name: self._metric(name)[rows].astype(np.float64) for name in CORRELATION_METRICS}
+        positive = {name: column > 0 for name, column in values.items()}
+        size = len(CORRELATION_METRICS)
+        matrix = [[1 if i == j else 0 for j in range(size)] for i in range(size)]
+        for i, a in enumerate(CORRELATION_METRICS):
+            for j in range(i + 1, size):
+                b = CORRELATION_METRICS[j]
+                both = positive[a] & positive[b]
+                x, y = values[a][both], values[b][both]
+                n = len(x)
+                sx, sy = x.sum(), y.sum()
+                denominator = (n * np.dot(x, x) - sx * sx) * (n * np.dot(y, y) - sy * sy)
+                r = float((n * np.dot(x, y) - sx * sy) / denominator ** 0.5) if denominator > 0 else 0
+                matrix[i][j] = matrix[j][i] = r
+        return {"metrics": CORRELATION_METRICS, "matrix": matrix}
+
+    def scatter_panel(self, filters: dict, points: dict | None = None) -> dict:
+        mode = points["mode"] if points else "exact"
+        if mode == "exact":
+            scatter_data, correlation_data = self._points(self.select(filters))
+            data = {"scatter_data": scatter_data, "correlation_data": correlation_data}
+        else:
+            data = {"correlation_matrix": self.correlation_matrix(filters)}
+            if mode == "sample":
+                data["scatter_data"], data["correlation_data"] = self.point_sample(filters, points["sample"])
+            else:
+                data["scatter_bins"] = self.histogram2d(filters, "price", "units_sold", points["bins"])
+                data["correlation_bins"] = self.histogram2d(filters, "ram", "units_sold", points["bins"])
+        if points and points["layout"] == "columns":
+            point_columns(data)
+        return data
+
+    def filter_catalog(self) -> dict:
+        """Every filter value, as aggregations.filter_catalog returns it"""
+        return {
+            "brands": self.brand_names,
+            "channels": [value for value in self.channels if value],
+            "regions": [value for value in self.regions if value],
+            "years": [value for value in self.years if value],
+        }
+
+
+# Same panel names and payloads as aggregations.PANELS, computed from a ColumnarTable
+COLUMNAR_PANELS = {
+    "kpis": lambda table, filters, points, ranking: {"kpis": table.kpis(filters)},
+    "brand_sales": lambda table, filters, points, ranking: dict(
+        zip(("brand_sales", "brand_revenue"), table.brand_totals(filters))
+    ),
+    "channel_sales": lambda table, filters, points, ranking: {"channel_sales": table.channel_sales(filters)},
+    "region_sales": lambda table, filters, points, ranking: {"region_sales": table.region_sales(filters)},
+    "yearly_trends": lambda table, filters, points, ranking: {"yearly_trends": table.yearly_trends(filters)},
+    "heatmap": lambda table, filters, points, ranking: {"heatmap_data": table.heatmap(filters)},
+    "treemap": lambda table, filters, points, ranking: {"treemap_data": table.treemap(filters, ranking)},
+    "top_models": lambda table, filters, points, ranking: dict(
+        zip(("top_models_data", "top_models_total"), table.top_models(filters, ranking))
+    ),
+    "scatter": lambda table, filters, points, ranking: table.scatter_panel(filters, points),
+    "filters": lambda table, filters, points, ranking: {"filters": table.filter_catalog()},
+}
+
+
+class ColumnarStore:
+    """In-memory analytics engine: a ColumnarTable tagged with its dataset version.
+
+    The table is loaded on first use and reloaded by the first request after
+    an upload bumps the dataset version; concurrent requests wait for that
+    reload rather than answer from the old data. The version is the shared
+    one in dataset_state, synced into each worker before dashboard requests,
+    so uploads made through other workers trigger the reload too.
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._table: ColumnarTable | None = None
+        self._version: int | None = None
+        self._lock = threading.Lock()
+
+    def table(self) -> ColumnarTable:
+        if self._table is not None and self._version == dataset_version():
+            return self._table
+        with self._lock:
+            version = dataset_version()
+            if self._table is None or self._version != version:
+                with self.session_factory() as db:
+                    self._table = ColumnarTable.load(db)
+                self._version = version
+            return self._table
+
+    def panel(self, name: str, filters: dict, points: dict | None = None, ranking: dict | None = None) -> dict:
+        return COLUMNAR_PANELS[name](self.table(), filters, points, ranking)
+
+    def dashboard_data(self, filters: dict, points: dict | None = None, ranking: dict | None = None) -> dict:
+        table = self.table()
+        data = {}
+        for build in COLUMNAR_PANELS.values():
+            data.update(build(table, filters, points, ranking))
+        return data
@@ -1,4 +1,9 @@
 import os
+import tempfile
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
 
 
 def get_config() -> dict:
@@ -10,9 +15,52 @@ def get_config() -> dict:
     return {
         "SECRET_KEY": os.getenv("SECRET_KEY", "dev-secret-key-change"),
         "DATABASE_URI": database_uri,
+        # Optional read replica for the dashboard and insights; empty means the primary
+        "DATABASE_READ_URI": os.getenv("DATABASE_READ_URI", ""),
+        # Longest the replica is expected to trail the primary; API responses read from it
+        # within this long of an upload are cached only until the window closes
+        "REPLICA_MAX_LAG_SECONDS": float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5")),
+        # Connection pool, applied to both engines
+        "DB_POOL_SIZE": int(os.getenv("DB_POOL_SIZE", "5")),
+        "DB_MAX_OVERFLOW": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "DB_POOL_TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "DB_POOL_RECYCLE": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "DB_POOL_PRE_PING": _flag("DB_POOL_PRE_PING", "true"),
+        # SQLite connection profile (WAL and synchronous=NORMAL are always on)
+        "SQLITE_BUSY_TIMEOUT_MS": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "SQLITE_MMAP_MB": int(os.getenv("SQLITE_MMAP_MB", "256")),
+        "SQLITE_CACHE_MB": int(os.getenv("SQLITE_CACHE_MB", "64")),
         # Power BI: supply these if using secure embed with token
         "PBI_EMBED_URL": os.getenv("PBI_EMBED_URL", ""),
         "PBI_REPORT_URL": os.getenv("PBI_REPORT_URL", ""),
+        # /api/data response cache, invalidated on upload
+        "API_CACHE_MAX_ENTRIES": int(os.getenv("API_CACHE_MAX_ENTRIES", "256")),
+        "API_CACHE_TTL": float(os.getenv("API_CACHE_TTL", "300")),
+        "API_CACHE_MAX_BYTES": int(os.getenv("API_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        # How often each worker checks the shared dataset version for uploads made by other workers
+        "DATASET_VERSION_CHECK_SECONDS": float(os.getenv("DATASET_VERSION_CHECK_SECONDS", "1")),
+        # Logged-in users kept in memory between requests
+        "USER_CACHE_MAX_ENTRIES": int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024")),
+        "USER_CACHE_TTL": float(os.getenv("USER_CACHE_TTL", "60")),
+        # How often each worker checks dataset_state for role changes
+        "USER_CACHE_CHECK_SECONDS": float(os.getenv("USER_CACHE_CHECK_SECONDS", "1")),
+        # Rows per executemany INSERT batch during CSV ingestion
+        "INGEST_CHUNK_SIZE": int(os.getenv("INGEST_CHUNK_SIZE", "5000")),
+        # Streaming uploads: CSV rows read and committed per chunk
+        "UPLOAD_CHUNK_ROWS": int(os.getenv("UPLOAD_CHUNK_ROWS", "50000")),
+        "MAX_UPLOAD_MB": int(os.getenv("MAX_UPLOAD_MB", "32")),
+        # Limit for stream and background uploads, which never hold the whole file in memory
+        "MAX_STREAM_UPLOAD_MB": int(os.getenv("MAX_STREAM_UPLOAD_MB", "10240")),
+        # Background upload jobs: local thread pool and spool directory
+        "UPLOAD_WORKERS": int(os.getenv("UPLOAD_WORKERS", "1")),
+        "UPLOAD_SPOOL_DIR": os.getenv("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "mobile-uploads")),
+        # Rows fetched per server-side cursor batch when streaming exports
+        "EXPORT_BATCH_SIZE": int(os.getenv("EXPORT_BATCH_SIZE", "10000")),
+        # Log SQL statements slower than this many milliseconds; 0 turns the log off
+        "SLOW_QUERY_MS": float(os.getenv("SLOW_QUERY_MS", "0")),
+        # Dashboard panels: "sql" queries the database, "columnar" answers from
+        # an in-memory copy of the sales table reloaded after each upload
+        "ANALYTICS_ENGINE": os.getenv("ANALYTICS_ENGINE", "sql").strip().lower(),
     }
 
 
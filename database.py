@@ -0,0 +1,51 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+
+def _is_sqlite_memory(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(uri: str, cfg: dict) -> dict:
+    """create_engine keyword arguments for the pool settings in ``cfg``.
+
+    In-memory SQLite keeps SQLAlchemy's single-connection pool, which takes
+    no sizing arguments.
+    """
+    options = {"future": True, "pool_pre_ping": cfg["DB_POOL_PRE_PING"]}
+    if not _is_sqlite_memory(make_url(uri)):
+        options.update(
+            pool_size=cfg["DB_POOL_SIZE"],
+            max_overflow=cfg["DB_MAX_OVERFLOW"],
+            pool_timeout=cfg["DB_POOL_TIMEOUT"],
+            pool_recycle=cfg["DB_POOL_RECYCLE"],
+        )
+    return options
+
+
+def _sqlite_pragmas(cfg: dict) -> list[str]:
+    return [
+        "PRAGMA journal_mode=WAL",  # Readers no longer block on the upload writer
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={cfg['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"PRAGMA mmap_size={cfg['SQLITE_MMAP_MB'] * 1024 * 1024}",
+        f"PRAGMA cache_size=-{cfg['SQLITE_CACHE_MB'] * 1024}",  # Negative: KiB rather than pages
+    ]
+
+
+def create_db_engine(uri: str, cfg: dict):
+    """Engine for ``uri`` with the configured pool, plus the SQLite pragma profile on every new connection"""
+    engine = create_engine(uri, **engine_options(uri, cfg))
+    if engine.dialect.name == "sqlite":
+        pragmas = _sqlite_pragmas(cfg)
+        if _is_sqlite_memory(engine.url):
+            pragmas = pragmas[1:]  # In-memory databases have no WAL
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return engine
@@ -0,0 +1,252 @@
+import csv
+import io
+
+from models import Brand, PhoneModel, Sale
+
+# Low-cardinality columns written as Arrow dictionary arrays
+DICTIONARY_COLUMNS = {"Brand": Brand.name, "Region": Sale.region, "Channel": Sale.channel}
+
+EXPORT_COLUMNS = [
+    "Brand",
+    "Model",
+    "RAM",
+    "Storage",
+    "Camera",
+    "Battery",
+    "Processor",
+    "Price",
+    "Units Sold",
+    "Region",
+    "Channel",
+    "Year",
+]
+
+
+def export_query(db):
+    """Joined sales rows with the same column labels the upload CSV uses"""
+    return (
+        db.query(
+            Brand.name.label("Brand"),
+            PhoneModel.model_name.label("Model"),
+            PhoneModel.ram.label("RAM"),
+            PhoneModel.storage.label("Storage"),
+            PhoneModel.camera.label("Camera"),
+            PhoneModel.battery.label("Battery"),
+            PhoneModel.processor.label("Processor"),
+            Sale.average_price.label("Price"),
+            Sale.units_sold.label("Units Sold"),
+            Sale.region.label("Region"),
+            Sale.channel.label("Channel"),
+            Sale.year.label("Year"),
+        )
+        .join(PhoneModel, PhoneModel.id == Sale.model_id)
+        .join(Brand, Brand.id == PhoneModel.brand_id)
+        .order_by(Sale.id)
+    )
+
+
+def iter_export_batches(session_factory, batch_size: int = 10000):
+    """Yield lists of export rows, fetched with a server-side cursor where supported"""
+    with session_factory() as db:
+        batch = []
+        for row in export_query(db).yield_per(batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def stream_csv(session_factory, batch_size: int = 10000):
+    """Generate CSV bytes batch by batch; memory is bounded by ``batch_size``"""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    yield buf.getvalue().encode()
+    for batch in iter_export_batches(session_factory, batch_size):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(batch)
+        yield buf.getvalue().encode()
+
+
+class _ChunkSink:
+    """Minimal writable file object whose contents are drained after each batch"""
+
+    closed = False
+
+    def __init__(self):
+        self._buf = io.BytesIO()
+        self._pos = 0
+
+    def write(self, data) -> int:
+        self._buf.write(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return data
+
+
+def _arrow_schema(pa):
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("Brand", dictionary),
+        ("Model", pa.string()),
+        ("RAM", pa.string()),
+        ("Storage", pa.string()),
+        ("Camera", pa.string()),
+        ("Battery", pa.string()),
+        ("Processor", pa.string()),
+        ("Price", pa.float64()),
+        ("Units Sold", pa.int64()),
+        ("Region", dictionary),
+        ("Channel", dictionary),
+        ("Year", pa.int32()),
+    ])
+
+
+def _dictionaries(pa, session_factory) -> dict:
+    """Fixed per-export dictionaries so every record batch shares them"""
+    dictionaries = {}
+    with session_factory() as db:
+        for name, column in DICTIONARY_COLUMNS.items():
+            values = [value for (value,) in db.query(column).filter(column.isnot(None)).distinct().order_by(column)]
+            dictionaries[name] = (pa.array(values, pa.string()), {value: i for i, value in enumerate(values)})
+    return dictionaries
+
+
+def iter_record_batches(session_factory, batch_size: int = 10000):
+    """Yield RecordBatches with dictionary-encoded Brand/Region/Channel columns"""
+    import pyarrow as pa
+
+    schema = _arrow_schema(pa)
+    dictionaries = _dictionaries(pa, session_factory)
+    for batch in iter_export_batches(session_factory, batch_size):
+        arrays = []
+        for field, values in zip(schema, zip(*batch)):
+            if field.name in dictionaries:
+                dictionary, codes = dictionaries[field.name]
+                indices = pa.array([codes.get(value) for value in values], pa.int32())
+                arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+            else:
+                arrays.append(pa.array(values, field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def stream_columnar(session_factory, format: str, batch_size: int = 10000):
+    """Return a generator that writes a Parquet or Arrow IPC file one record batch at a time.
+
+    pyarrow is imported here rather than inside the generator so a missing
+    install raises ImportError before the response starts.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def generate():
+        sink = _ChunkSink()
+        schema = _arrow_schema(pa)
+        if format == "parquet":
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+        try:
+            for record_batch in iter_record_batches(session_factory, batch_size):
+                writer.write_batch(record_batch)
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    return generate()
+
+
+def write_xlsx(session_factory, fileobj, batch_size: int = 10000) -> None:
+    """Write an .xlsx with openpyxl's write-only workbook, appending rows as they stream in"""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sales")
+    ws.append(EXPORT_COLUMNS)
+    for batch in iter_export_batches(session_factory, batch_size):
+        for row in batch:
+            ws.append(list(row))
+    wb.save(fileobj)
+
+
+# Landscape A4 column widths in points, matching EXPORT_COLUMNS
+PDF_COLUMN_WIDTHS = [55, 75, 35, 45, 45, 50, 95, 55, 50, 80, 50, 35]
+PDF_FONT_SIZE = 7
+PDF_LINE_HEIGHT = 10
+PDF_MARGIN = 36
+
+
+def _pdf_cell(value, width: float) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        value = f"{value:,.0f}"
+    text = str(value)
+    max_chars = int(width / (PDF_FONT_SIZE * 0.5))
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+def write_pdf(session_factory, fileobj, batch_size: int = 10000) -> None:
+    """Render every export row as a paginated table, one page at a time.
+
+    Each page is drawn as a single text object to keep page streams small;
+    reportlab still holds finished pages until ``save()``.
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+
+    width, height = landscape(A4)
+    c = canvas.Canvas(fileobj, pagesize=(width, height), pageCompression=1)
+    c.setTitle("Mobile Sales Export")
+    page = 0
+
+    def start_page():
+        nonlocal page
+        page += 1
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(PDF_MARGIN, height - PDF_MARGIN, "Mobile Sales Export")
+        c.drawRightString(width - PDF_MARGIN, height - PDF_MARGIN, f"Page {page}")
+        y = height - PDF_MARGIN - 2 * PDF_LINE_HEIGHT
+        c.setFont("Helvetica-Bold", PDF_FONT_SIZE)
+        x = PDF_MARGIN
+        for name, col_width in zip(EXPORT_COLUMNS, PDF_COLUMN_WIDTHS):
+            c.drawString(x, y, _pdf_cell(name, col_width))
+            x += col_width
+        text = c.beginText()
+        text.setFont("Helvetica", PDF_FONT_SIZE)
+        return text, y - PDF_LINE_HEIGHT
+
+    text, y = start_page()
+    for batch in iter_export_batches(session_factory, batch_size):
+        for row in batch:
+            if y < PDF_MARGIN:
+                c.drawText(text)
+                c.showPage()
+                text, y = start_page()
+            x = PDF_MARGIN
+            for value, col_width in zip(row, PDF_COLUMN_WIDTHS):
+                text.setTextOrigin(x, y)
+                text.textOut(_pdf_cell(value, col_width))
+                x += col_width
+            y -= PDF_LINE_HEIGHT
+    c.drawText(text)
+    c.showPage()
+    c.save()
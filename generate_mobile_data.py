@@ -1,8 +1,13 @@
-import csv
+import argparse
 import os
-import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 
 BRANDS = [
     "Apple",
@@ -51,94 +56,190 @@ OS_OPTIONS = ["Android 13", "Android 14", "iOS 16", "iOS 17"]
 DISPLAY_SIZES = ["6.1\"", "6.4\"", "6.7\"", "6.8\""]
 YEARS = [2022, 2023, 2024, 2025]
 
+# Price heuristic: Apple higher, value brands lower
+BASE_PRICES = {
+    "Apple": 95000,
+    "Samsung": 45000,
+    "OnePlus": 42000,
+    "Xiaomi": 25000,
+    "Vivo": 23000,
+    "Oppo": 24000,
+    "Realme": 22000,
+    "Motorola": 26000,
+    "Infinix": 18000,
+    "Tecno": 17000,
+}
+DEFAULT_BASE_PRICE = 30000
+
+
+# Columns of a generated sales file, in the order the upload CSV uses
+FIELDNAMES = [
+    "Brand",
+    "Model",
+    "RAM",
+    "Storage",
+    "Camera",
+    "Battery",
+    "Processor",
+    "OS",
+    "Display Size",
+    "Price",
+    "Units Sold",
+    "Region",
+    "Channel",
+    "Year",
+]
 
-def generate_models_per_brand(brand: str, count: int) -> list[dict]:
-    rows: list[dict] = []
-    for idx in range(1, count + 1):
-        model = f"{brand[:3].upper()}-{100+idx}"
-        ram = random.choice(RAM_OPTIONS)
-        storage = random.choice(STORAGE_OPTIONS)
-        camera = random.choice(CAMERA_OPTIONS)
-        battery = random.choice(BATTERY_OPTIONS)
-        processor = random.choice(PROCESSORS)
-        os_name = random.choice([o for o in OS_OPTIONS if ("iOS" in o) == (brand == "Apple")] or OS_OPTIONS)
-        display = random.choice(DISPLAY_SIZES)
-        year = random.choice(YEARS)
-
-        # Price heuristic: Apple higher, value brands lower
-        base_price = {
-            "Apple": 95000,
-            "Samsung": 45000,
-            "OnePlus": 42000,
-            "Xiaomi": 25000,
-            "Vivo": 23000,
-            "Oppo": 24000,
-            "Realme": 22000,
-            "Motorola": 26000,
-            "Infinix": 18000,
-            "Tecno": 17000,
-        }[brand]
-        spec_bump = (RAM_OPTIONS.index(ram) + STORAGE_OPTIONS.index(storage)) * 1500
-        price = base_price + spec_bump + random.randrange(-3000, 4000, 500)
-
-        # Create multiple regional/channel sales rows per model
-        regions = random.sample(REGIONS, k=5)
-        for region in regions:
-            channel = random.choice(CHANNELS)
-            units = random.randint(2000, 20000)
-            rows.append(
-                {
-                    "Brand": brand,
-                    "Model": model,
-                    "RAM": ram,
-                    "Storage": storage,
-                    "Camera": camera,
-                    "Battery": battery,
-                    "Processor": processor,
-                    "Price": price,
-                    "Units Sold": units,
-                    "Region": region,
-                    "Channel": channel,
-                    "Year": year,
-                }
-            )
-    return rows
-
-
-def generate_dataset(models_per_brand: int = 40) -> list[dict]:
-    dataset: list[dict] = []
-    for brand in BRANDS:
-        dataset.extend(generate_models_per_brand(brand, models_per_brand))
-    return dataset
+def model_catalog(brands=BRANDS, models_per_brand: int = 40, years=YEARS, seed: int = 0) -> pd.DataFrame:
+    """One row per phone model with its specs, launch year and price, drawn from ``seed``"""
+    rng = np.random.default_rng(seed)
+    brand_names = np.repeat(np.array(brands, dtype=object), models_per_brand)
+    numbers = np.tile(np.arange(101, 101 + models_per_brand), len(brands))
+    size = len(brand_names)
+
+    ram = rng.integers(0, len(RAM_OPTIONS), size)
+    storage = rng.integers(0, len(STORAGE_OPTIONS), size)
+    apple = brand_names == "Apple"
+    ios = np.array([o for o in OS_OPTIONS if "iOS" in o], dtype=object)
+    android = np.array([o for o in OS_OPTIONS if "iOS" not in o], dtype=object)
+    os_names = np.where(apple, ios[rng.integers(0, len(ios), size)], android[rng.integers(0, len(android), size)])
+    # Brand base price plus a spec bump and jitter
+    base = np.array([BASE_PRICES.get(brand, DEFAULT_BASE_PRICE) for brand in brand_names])
+    price = base + (ram + storage) * 1500 + rng.integers(-6, 8, size) * 500
+
+    def pick(options):
+        return np.array(options, dtype=object)[rng.integers(0, len(options), size)]
+
+    return pd.DataFrame({
+        "Brand": brand_names,
+        "Model": [f"{brand[:3].upper()}-{number}" for brand, number in zip(brand_names, numbers)],
+        "RAM": np.array(RAM_OPTIONS, dtype=object)[ram],
+        "Storage": np.array(STORAGE_OPTIONS, dtype=object)[storage],
+        "Camera": pick(CAMERA_OPTIONS),
+        "Battery": pick(BATTERY_OPTIONS),
+        "Processor": pick(PROCESSORS),
+        "OS": os_names,
+        "Display Size": pick(DISPLAY_SIZES),
+        "Price": price,
+        "Year": pick(list(years)),
+    })
+
+
+def generate_sales_chunk(catalog: pd.DataFrame, rows: int, seed: int, shard: int) -> pd.DataFrame:
+    """``rows`` sales of random catalog models; the same (seed, shard) always gives the same rows"""
+    rng = np.random.default_rng([seed, shard + 1])
+    chunk = catalog.take(rng.integers(0, len(catalog), rows)).reset_index(drop=True)
+    chunk["Units Sold"] = rng.integers(2000, 20001, rows)
+    chunk["Region"] = np.array(REGIONS, dtype=object)[rng.integers(0, len(REGIONS), rows)]
+    chunk["Channel"] = np.array(CHANNELS, dtype=object)[rng.integers(0, len(CHANNELS), rows)]
+    return chunk[FIELDNAMES]
+
+
+def iter_sales_chunks(rows: int, chunk_rows: int = 100000, seed: int = 0, brands=BRANDS,
+                      models_per_brand: int = 40, years=YEARS, workers: int = 1):
+    """Yield ``rows`` generated sales as DataFrames of at most ``chunk_rows``, in order.
+
+    Chunks are built on a pool of ``workers`` processes with at most two per
+    worker in flight, so memory stays bounded however slowly they are consumed.
+    Output depends only on the seed and chunk size, not on the worker count.
+    """
+    catalog = model_catalog(brands, models_per_brand, years, seed)
+    shards = [(shard, min(chunk_rows, rows - start)) for shard, start in enumerate(range(0, rows, chunk_rows))]
+    if workers <= 1:
+        for shard, size in shards:
+            yield generate_sales_chunk(catalog, size, seed, shard)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for shard, size in shards:
+            pending.append(pool.submit(generate_sales_chunk, catalog, size, seed, shard))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_csv(chunks, path) -> int:
+    total = 0
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        for index, chunk in enumerate(chunks):
+            chunk.to_csv(fh, header=index == 0, index=False)
+            total += len(chunk)
+    return total
+
+
+def write_parquet(chunks, path) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    total = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            total += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def load_database(chunks, database_uri: str, chunk_size: int = 5000) -> int:
+    """Bulk-load generated sales into the app's tables through the upload ingest path, one commit per chunk"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from cache import bump_dataset_version
+    from ingest import ingest_dataframe
+    from models import Base
+
+    engine = create_engine(database_uri, future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    total = 0
+    with SessionLocal() as db:
+        for chunk in chunks:
+            total += ingest_dataframe(db, chunk, chunk_size=chunk_size)
+            db.commit()
+    bump_dataset_version(SessionLocal)
+    return total
 
 
 def main():
-    out_dir = Path("data")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "mobiles_full.csv"
-    rows = generate_dataset(models_per_brand=40)
-    fieldnames = [
-        "Brand",
-        "Model",
-        "RAM",
-        "Storage",
-        "Camera",
-        "Battery",
-        "Processor",
-        "Price",
-        "Units Sold",
-        "Region",
-        "Channel",
-        "Year",
-    ]
-    with out_path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"Wrote {len(rows)} rows to {out_path}")
+    parser = argparse.ArgumentParser(description="Generate synthetic mobile sales data.")
+    parser.add_argument("--rows", type=int, help="sales to generate (default: 5 per model)")
+    parser.add_argument("--brands", nargs="+", default=BRANDS)
+    parser.add_argument("--models-per-brand", type=int, default=40)
+    parser.add_argument("--years", type=int, nargs="+", default=YEARS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--format", choices=["csv", "parquet", "db"], default="csv")
+    parser.add_argument("--output", help="file to write (default: data/mobiles_full.csv or .parquet)")
+    parser.add_argument("--database-uri", help="database for --format db (default: the app's DATABASE_URI)")
+    args = parser.parse_args()
+
+    rows = args.rows if args.rows is not None else len(args.brands) * args.models_per_brand * 5
+    chunks = iter_sales_chunks(
+        rows, args.chunk_rows, args.seed, args.brands, args.models_per_brand, args.years, args.workers
+    )
+    started = time.perf_counter()
+    if args.format == "db":
+        from config import get_config
+
+        target = args.database_uri or get_config()["DATABASE_URI"]
+        written = load_database(chunks, target)
+    else:
+        target = Path(args.output or f"data/mobiles_full.{args.format}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        written = (write_csv if args.format == "csv" else write_parquet)(chunks, target)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {written} rows to {target} in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
 
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,197 @@
+import time
+
+import pandas as pd
+from sqlalchemy import insert, tuple_
+
+from models import Brand, PhoneModel, Sale
+from rollups import apply_sales_deltas
+from specs import parse_specs
+
+REQUIRED_COLUMNS = {
+    "Brand",
+    "Model",
+    "RAM",
+    "Storage",
+    "Camera",
+    "Battery",
+    "Processor",
+    "Price",
+    "Units Sold",
+    "Region",
+    "Channel",
+    "Year",
+}
+
+# Read as strings so chunked reads don't infer different dtypes per chunk
+TEXT_COLUMNS = [
+    "Brand",
+    "Model",
+    "RAM",
+    "Storage",
+    "Camera",
+    "Battery",
+    "Processor",
+    "OS",
+    "Display Size",
+    "Region",
+    "Channel",
+]
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+LOOKUP_BATCH = 500
+
+
+class IngestError(ValueError):
+    pass
+
+
+def _batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _numeric(series: pd.Series) -> pd.Series:
+    """Parse numbers like "₹45,000" column-wise; blanks and junk become 0"""
+    if series.dtype == object:
+        series = series.astype(str).str.replace(",", "", regex=False).str.replace("₹", "", regex=False).str.strip()
+    return pd.to_numeric(series, errors="coerce").fillna(0)
+
+
+def _text(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[column].where(df[column].notna(), "").astype(str)
+
+
+def _resolve_brands(db, names: list) -> dict:
+    brand_ids = {}
+    for batch in _batches(names, LOOKUP_BATCH):
+        brand_ids.update(db.query(Brand.name, Brand.id).filter(Brand.name.in_(batch)).all())
+    missing = [name for name in names if name not in brand_ids]
+    if missing:
+        db.execute(insert(Brand), [{"name": name} for name in missing])
+        for batch in _batches(missing, LOOKUP_BATCH):
+            brand_ids.update(db.query(Brand.name, Brand.id).filter(Brand.name.in_(batch)).all())
+    return brand_ids
+
+
+def _lookup_models(db, keys: list) -> dict:
+    model_ids = {}
+    for batch in _batches(keys, LOOKUP_BATCH):
+        rows = (
+            db.query(PhoneModel.brand_id, PhoneModel.model_name, PhoneModel.id)
+            .filter(tuple_(PhoneModel.brand_id, PhoneModel.model_name).in_(batch))
+            .all()
+        )
+        for brand_id, model_name, model_id in rows:
+            model_ids.setdefault((brand_id, model_name), model_id)
+    return model_ids
+
+
+def _resolve_models(db, models: pd.DataFrame) -> dict:
+    """Map (brand_id, model_name) to ids, inserting models not seen before.
+
+    ``models`` holds one row per distinct key; its spec columns describe any
+    model that has to be created.
+    """
+    keys = list(zip(models["brand_id"].tolist(), models["Model"].tolist()))
+    model_ids = _lookup_models(db, keys)
+    new_models = models[[key not in model_ids for key in keys]]
+    if not new_models.empty:
+        records = pd.DataFrame({
+            "brand_id": new_models["brand_id"],
+            "model_name": new_models["Model"],
+            "ram": _text(new_models, "RAM"),
+            "storage": _text(new_models, "Storage"),
+            "camera": _text(new_models, "Camera"),
+            "battery": _text(new_models, "Battery"),
+            "processor": _text(new_models, "Processor"),
+            "os": _text(new_models, "OS"),
+            "display_size": _text(new_models, "Display Size"),
+            "launch_year": new_models["year"],
+        })
+        records = records.join(parse_specs(records)).to_dict("records")
+        db.execute(insert(PhoneModel), records)
+        model_ids.update(_lookup_models(db, [(r["brand_id"], r["model_name"]) for r in records]))
+    return model_ids
+
+
+def ingest_dataframe(db, df: pd.DataFrame, chunk_size: int = 5000) -> int:
+    """Load a sales DataFrame with set-based brand/model resolution and batched inserts.
+
+    Brands and models are looked up once per distinct key and only missing ones
+    are inserted; sales go in as executemany ``INSERT`` batches of ``chunk_size``
+    and their totals are folded into the rollup tables. The caller owns the
+    transaction. Returns the number of sales inserted.
+    """
+    if df.empty:
+        return 0
+
+    df = df.assign(
+        Brand=df["Brand"].astype(str),
+        Model=df["Model"].astype(str),
+        units=_numeric(df["Units Sold"]).astype("int64"),
+        price=_numeric(df["Price"]).astype("float64"),
+        year=_numeric(df["Year"]).astype("int64"),
+    )
+
+    brand_ids = _resolve_brands(db, df["Brand"].unique().tolist())
+    df["brand_id"] = df["Brand"].map(brand_ids).astype("int64")
+
+    models = df.drop_duplicates(["brand_id", "Model"])
+    model_ids = _resolve_models(db, models)
+    df["model_id"] = [model_ids[key] for key in zip(df["brand_id"].tolist(), df["Model"].tolist())]
+
+    sales = pd.DataFrame({
+        "model_id": df["model_id"],
+        "units_sold": df["units"],
+        "total_revenue": df["price"] * df["units"],
+        "average_price": df["price"],
+        "region": _text(df, "Region"),
+        "channel": _text(df, "Channel"),
+        "year": df["year"],
+    })
+    for start in range(0, len(sales), chunk_size):
+        db.execute(insert(Sale), sales.iloc[start:start + chunk_size].to_dict("records"))
+    apply_sales_deltas(db, sales.assign(brand_id=df["brand_id"]))
+    return len(sales)
+
+
+def read_csv_chunks(fileobj, chunk_rows: int = 50000):
+    """Yield DataFrames of at most ``chunk_rows`` rows after validating the header.
+
+    The header is checked before any rows are read, so an empty or
+    header-only file with the wrong columns fails instead of loading nothing.
+    """
+    start = fileobj.tell()
+    try:
+        columns = pd.read_csv(fileobj, nrows=0).columns
+    except pd.errors.EmptyDataError:
+        raise IngestError("CSV is empty") from None
+    missing = REQUIRED_COLUMNS - set(columns)
+    if missing:
+        raise IngestError(f"CSV missing required columns: {', '.join(sorted(missing))}")
+    fileobj.seek(start)
+    with pd.read_csv(fileobj, chunksize=chunk_rows, dtype={column: str for column in TEXT_COLUMNS}) as reader:
+        yield from reader
+
+
+def rows_per_second(rows: int, elapsed: float) -> float:
+    return rows / elapsed if elapsed > 0 else 0.0
+
+
+def ingest_csv_stream(db, fileobj, chunk_rows: int = 50000, chunk_size: int = 5000, on_progress=None) -> int:
+    """Stream a CSV into the database one chunk at a time, committing each chunk.
+
+    Memory stays bounded by ``chunk_rows`` whatever the file size. Rows from
+    chunks committed before an error are kept. ``on_progress(rows, elapsed)`` is
+    called after every commit. Returns the number of sales inserted.
+    """
+    started = time.perf_counter()
+    total = 0
+    for chunk in read_csv_chunks(fileobj, chunk_rows):
+        total += ingest_dataframe(db, chunk, chunk_size=chunk_size)
+        db.commit()
+        if on_progress is not None:
+            on_progress(total, time.perf_counter() - started)
+    return total
@@ -1,72 +1,119 @@
-from flask import Blueprint, render_template, current_app, jsonify
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from flask import Blueprint, render_template, current_app
 from flask_login import login_required
-from sqlalchemy import func, case
-from models import Brand, PhoneModel, Sale
+from sqlalchemy import func
+
+from aggregations import supports_window_functions
+from cache import dataset_version
+from models import Brand, PhoneModel, BrandSalesRollup, ModelSalesRollup
+from responses import accepted_encoding, encode_body, json_response
 
 insights_bp = Blueprint("insights", __name__, template_folder="templates")
 
 
-def generate_insights(db):
-    """Generate automatic insights from sales data"""
-    insights = []
-    
-    # 1. Top brand by region and year
-    region_year_query = (
+def _brand_facts(db):
+    """Brand x region x year totals from one pass over the brand rollup.
+
+    Returns ``(rows, region_year_leaders)``. With window functions the leader
+    of each region-year is ranked by ``ROW_NUMBER()`` in the same statement;
+    otherwise the first row per key wins, as rows arrive sorted by units.
+    """
+    units = func.sum(BrandSalesRollup.units_sold)
+    columns = [
+        Brand.name.label("brand"),
+        BrandSalesRollup.region,
+        BrandSalesRollup.year,
+        units.label("total_units"),
+    ]
+    windowed = supports_window_functions(db)
+    if windowed:
+        columns.append(
+            func.row_number()
+            .over(partition_by=(BrandSalesRollup.region, BrandSalesRollup.year), order_by=units.desc())
+            .label("region_rank")
+        )
+    rows = (
+        db.query(*columns)
+        .join(Brand, Brand.id == BrandSalesRollup.brand_id)
+        .group_by(Brand.name, BrandSalesRollup.region, BrandSalesRollup.year)
+        .order_by(BrandSalesRollup.year.desc(), units.desc())
+        .all()
+    )
+
+    leaders = {}
+    for row in rows:
+        key = (row.region, row.year)
+        if windowed and row.region_rank != 1:
+            continue
+        leaders.setdefault(key, row)
+    return rows, list(leaders.values())
+
+
+def _spec_facts(db) -> dict:
+    """Units per battery, RAM and storage value from one pass over the model rollup.
+
+    Battery values carry their parsed capacity: ``(battery, units, battery_mah)``.
+    """
+    rows = (
         db.query(
-            Brand.name.label("brand"),
-            Sale.region,
-            Sale.year,
-            func.sum(Sale.units_sold).label("total_units")
+            PhoneModel.battery,
+            PhoneModel.battery_mah,
+            PhoneModel.ram,
+            PhoneModel.storage,
+            func.sum(ModelSalesRollup.units_sold).label("total_units"),
         )
-        .join(PhoneModel, PhoneModel.id == Sale.model_id)
-        .join(Brand, Brand.id == PhoneModel.brand_id)
-        .group_by(Brand.name, Sale.region, Sale.year)
-        .order_by(Sale.year.desc(), func.sum(Sale.units_sold).desc())
+        .join(ModelSalesRollup, ModelSalesRollup.model_id == PhoneModel.id)
+        .group_by(PhoneModel.battery, PhoneModel.battery_mah, PhoneModel.ram, PhoneModel.storage)
+        .all()
     )
+    totals = {"battery": {}, "ram": {}, "storage": {}}
+    battery_mah = {}
+    for row in rows:
+        battery_mah[row.battery] = row.battery_mah or 0
+        for spec, by_value in totals.items():
+            value = getattr(row, spec)
+            if value is not None and value != "":
+                by_value[value] = by_value.get(value, 0) + (row.total_units or 0)
+    # Best-selling value first
+    ranked = {
+        spec: sorted(by_value.items(), key=lambda item: item[1], reverse=True)
+        for spec, by_value in totals.items()
+    }
+    ranked["battery"] = [(value, units, battery_mah[value]) for value, units in ranked["battery"]]
+    return ranked
+
+
+def generate_insights(db):
+    """Generate automatic insights from the sales rollup tables.
+
+    Three statements in total: brand totals (with region-year ranking),
+    spec totals, and channel totals.
+    """
+    insights = []
+    brand_rows, leaders = _brand_facts(db)
     
-    # Get top brand for each region-year combination
-    region_year_sales = {}
-    for row in region_year_query.all():
-        key = f"{row.region}_{row.year}"
-        if key not in region_year_sales:
-            region_year_sales[key] = {
-                "brand": row.brand,
-                "region": row.region,
-                "year": row.year,
-                "units": row.total_units
-            }
-    
-    # Generate insights for top brands by region
-    for key, data in list(region_year_sales.items())[:5]:  # Top 5
+    # 1. Top brand by region and year
+    for data in leaders[:5]:  # Top 5
         insights.append({
             "type": "performance",
             "severity": "info",
-            "title": f"{data['brand']} models sold highest in {data['region']} in {data['year']}.",
-            "description": f"Total units sold: {data['units']:,}",
+            "title": f"{data.brand} models sold highest in {data.region} in {data.year}.",
+            "description": f"Total units sold: {data.total_units:,}",
             "icon": "trending-up"
         })
     
-    # 2. Year-over-year sales changes by brand
-    brand_yearly = (
-        db.query(
-            Brand.name.label("brand"),
-            Sale.year,
-            func.sum(Sale.units_sold).label("total_units")
-        )
-        .join(PhoneModel, PhoneModel.id == Sale.model_id)
-        .join(Brand, Brand.id == PhoneModel.brand_id)
-        .group_by(Brand.name, Sale.year)
-        .order_by(Brand.name, Sale.year)
-    )
-    
+    # 2. Year-over-year sales changes by brand, summed from the same rows
     brand_sales_by_year = {}
-    for row in brand_yearly.all():
-        if row.brand not in brand_sales_by_year:
-            brand_sales_by_year[row.brand] = {}
-        brand_sales_by_year[row.brand][row.year] = row.total_units
+    for row in brand_rows:
+        year_data = brand_sales_by_year.setdefault(row.brand, {})
+        year_data[row.year] = year_data.get(row.year, 0) + row.total_units
     
     # Calculate YoY changes
-    for brand, year_data in brand_sales_by_year.items():
+    for brand in sorted(brand_sales_by_year):
+        year_data = brand_sales_by_year[brand]
         years = sorted(year_data.keys())
         if len(years) >= 2:
             prev_year = years[-2]
@@ -85,93 +132,53 @@ def generate_insights(db):
                         "icon": "trending-down" if change_pct < 0 else "trending-up"
                     })
     
+    specs = _spec_facts(db)
+
     # 3. Battery capacity correlation with sales
-    battery_sales_query = (
-        db.query(
-            PhoneModel.battery,
-            func.sum(Sale.units_sold).label("total_units"),
-            func.avg(Sale.units_sold).label("avg_units")
-        )
-        .join(Sale, Sale.model_id == PhoneModel.id)
-        .filter(PhoneModel.battery.isnot(None), PhoneModel.battery != "")
-        .group_by(PhoneModel.battery)
-        .order_by(func.sum(Sale.units_sold).desc())
-    )
-    
-    battery_data = battery_sales_query.all()
+    battery_data = specs["battery"]
     if len(battery_data) >= 2:
         # Check if there's a clear pattern (higher battery = more sales)
-        top_battery = battery_data[0]
-        if top_battery.total_units > 0:
-            # Extract numeric battery value for comparison
-            try:
-                battery_str = str(top_battery.battery).replace("mAh", "").replace(" ", "").strip()
-                battery_val = int(battery_str) if battery_str else 0
-                
-                if battery_val > 4000:  # High capacity
-                    insights.append({
-                        "type": "correlation",
-                        "severity": "info",
-                        "title": "Battery capacity strongly influences sales.",
-                        "description": f"Models with {top_battery.battery} battery show highest sales performance",
-                        "icon": "battery-full"
-                    })
-            except:
-                pass
+        top_battery, top_units, battery_val = battery_data[0]
+        if top_units > 0 and battery_val > 4000:  # High capacity
+            insights.append({
+                "type": "correlation",
+                "severity": "info",
+                "title": "Battery capacity strongly influences sales.",
+                "description": f"Models with {top_battery} battery show highest sales performance",
+                "icon": "battery-full"
+            })
     
     # 4. RAM correlation
-    ram_sales_query = (
-        db.query(
-            PhoneModel.ram,
-            func.sum(Sale.units_sold).label("total_units")
-        )
-        .join(Sale, Sale.model_id == PhoneModel.id)
-        .filter(PhoneModel.ram.isnot(None), PhoneModel.ram != "")
-        .group_by(PhoneModel.ram)
-        .order_by(func.sum(Sale.units_sold).desc())
-    )
-    
-    ram_data = ram_sales_query.first()
-    if ram_data and ram_data.total_units > 0:
+    if specs["ram"] and specs["ram"][0][1] > 0:
+        ram, total_units = specs["ram"][0]
         insights.append({
             "type": "correlation",
             "severity": "info",
-            "title": f"Models with {ram_data.ram} RAM show highest sales.",
-            "description": f"Total units sold: {ram_data.total_units:,}",
+            "title": f"Models with {ram} RAM show highest sales.",
+            "description": f"Total units sold: {total_units:,}",
             "icon": "memory"
         })
     
     # 5. Storage correlation
-    storage_sales_query = (
-        db.query(
-            PhoneModel.storage,
-            func.sum(Sale.units_sold).label("total_units")
-        )
-        .join(Sale, Sale.model_id == PhoneModel.id)
-        .filter(PhoneModel.storage.isnot(None), PhoneModel.storage != "")
-        .group_by(PhoneModel.storage)
-        .order_by(func.sum(Sale.units_sold).desc())
-    )
-    
-    storage_data = storage_sales_query.first()
-    if storage_data and storage_data.total_units > 0:
+    if specs["storage"] and specs["storage"][0][1] > 0:
+        storage, total_units = specs["storage"][0]
         insights.append({
             "type": "correlation",
             "severity": "info",
-            "title": f"Models with {storage_data.storage} storage are most popular.",
-            "description": f"Total units sold: {storage_data.total_units:,}",
+            "title": f"Models with {storage} storage are most popular.",
+            "description": f"Total units sold: {total_units:,}",
             "icon": "hard-drive"
         })
     
     # 6. Channel performance
     channel_query = (
         db.query(
-            Sale.channel,
-            func.sum(Sale.units_sold).label("total_units"),
-            func.sum(Sale.total_revenue).label("total_revenue")
+            BrandSalesRollup.channel,
+            func.sum(BrandSalesRollup.units_sold).label("total_units"),
+            func.sum(BrandSalesRollup.total_revenue).label("total_revenue")
         )
-        .group_by(Sale.channel)
-        .order_by(func.sum(Sale.units_sold).desc())
+        .group_by(BrandSalesRollup.channel)
+        .order_by(func.sum(BrandSalesRollup.units_sold).desc())
     )
     
     top_channel = channel_query.first()
@@ -187,13 +194,71 @@ def generate_insights(db):
     return insights
 
 
+class InsightStore:
+    """Latest generated insights, tagged with the dataset version they describe.
+
+    Readers always get the stored snapshot; once the dataset version moves on
+    it is flagged stale and a single background refresh is queued. Only the
+    very first read, before anything was computed, blocks on generation.
+    The version is the shared one from the dataset_state table, so uploads
+    made through any worker mark every worker's snapshot stale.
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._insights: list[dict] | None = None
+        self._version: int | None = None
+        self._computed_at: datetime | None = None
+        self._pending = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="insights")
+
+    def refresh(self) -> None:
+        """Regenerate insights now, in the calling thread"""
+        # Read the version first so an upload landing mid-refresh still marks it stale
+        version = dataset_version()
+        try:
+            with self.session_factory() as db:
+                insights = generate_insights(db)
+        finally:
+            self.session_factory.remove()
+        with self._lock:
+            self._insights = insights
+            self._version = version
+            self._computed_at = datetime.now(timezone.utc)
+
+    def refresh_async(self):
+        """Queue a background refresh unless one is already waiting or running"""
+        with self._lock:
+            if self._pending is None or self._pending.done():
+                self._pending = self._executor.submit(self.refresh)
+            return self._pending
+
+    def get(self) -> dict:
+        if self._insights is None:
+            self.refresh()
+        with self._lock:
+            stale = self._version != dataset_version()
+            snapshot = {
+                "insights": self._insights,
+                "computed_at": self._computed_at.isoformat(),
+                "dataset_version": self._version,
+                "stale": stale,
+            }
+        if stale:
+            self.refresh_async()
+        return snapshot
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
 @insights_bp.route("/insights")
 @login_required
 def index():
     """Display insights and alerts page"""
-    SessionLocal = current_app.session_factory
-    with SessionLocal() as db:
-        insights = generate_insights(db)
+    snapshot = current_app.insight_store.get()
+    insights = snapshot["insights"]
     
     # Separate insights by type
     performance_insights = [i for i in insights if i["type"] == "performance"]
@@ -205,7 +270,9 @@ def index():
         performance_insights=performance_insights,
         trend_insights=trend_insights,
         correlation_insights=correlation_insights,
-        all_insights=insights
+        all_insights=insights,
+        computed_at=snapshot["computed_at"],
+        stale=snapshot["stale"],
     )
 
 
@@ -213,10 +280,11 @@ def index():
 @login_required
 def api_insights():
     """API endpoint to get insights as JSON"""
-    SessionLocal = current_app.session_factory
-    with SessionLocal() as db:
-        insights = generate_insights(db)
-    
-    return jsonify({"insights": insights})
-
-
+    snapshot = current_app.insight_store.get()
+    body = current_app.json.dumps({
+        "insights": snapshot["insights"],
+        "computed_at": snapshot["computed_at"],
+        "stale": snapshot["stale"],
+    }).encode()
+    encoding = accepted_encoding()
+    return json_response(encode_body(body, encoding), encoding)
\ No newline at end of file
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import bump_dataset_version
+from models import UploadJobRecord
+
+
+class UploadJob:
+    def __init__(self, job_id: str, filename: str, path: str):
+        self.id = job_id
+        self.filename = filename
+        self.path = path
+        self.status = "queued"  # queued -> running -> done/failed
+        self.rows = 0
+        self.rows_per_sec = 0.0
+        self.errors: list[str] = []
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "done": self.done,
+            "rows": self.rows,
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "errors": list(self.errors),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def to_record(self) -> UploadJobRecord:
+        return UploadJobRecord(
+            id=self.id, filename=self.filename, status=self.status, rows=self.rows, rows_per_sec=self.rows_per_sec,
+            errors="\n".join(self.errors), created_at=self.created_at, started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+    @classmethod
+    def from_record(cls, record: UploadJobRecord) -> "UploadJob":
+        job = cls(record.id, record.filename, "")
+        job.status = record.status
+        job.rows = record.rows or 0
+        job.rows_per_sec = record.rows_per_sec or 0.0
+        job.errors = record.errors.splitlines() if record.errors else []
+        job.created_at = record.created_at
+        job.started_at = record.started_at
+        job.finished_at = record.finished_at
+        return job
+
+
+class UploadJobQueue:
+    """Runs spooled CSV imports on a local thread pool and tracks their progress.
+
+    Each job streams its spool file through ``ingest.ingest_csv_stream`` using
+    the app's scoped session factory, so sessions are per worker thread.
+    Job state is also written to the ``upload_jobs`` table on every change,
+    so any worker process can answer a status poll; the worker running a
+    job answers from memory.
+    ``after_ingest`` is called with no arguments once a job has finished;
+    ``metrics``, if given, records the throughput of each successful job.
+    """
+
+    def __init__(self, session_factory, spool_dir: str, workers: int = 1, chunk_rows: int = 50000,
+                 chunk_size: int = 5000, history: int = 100, after_ingest=None, metrics=None):
+        self.session_factory = session_factory
+        # Status writes use their own sessions, never the ingest thread's scoped one
+        self._record_sessions = getattr(session_factory, "session_factory", session_factory)
+        self.after_ingest = after_ingest
+        self.metrics = metrics
+        self.spool_dir = spool_dir
+        self.chunk_rows = chunk_rows
+        self.chunk_size = chunk_size
+        self.history = history
+        self._jobs: OrderedDict[str, UploadJob] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload-job")
+        os.makedirs(spool_dir, exist_ok=True)
+
+    def spool(self, file) -> UploadJob:
+        """Save an uploaded FileStorage to the spool directory and queue it"""
+        job_id = uuid.uuid4().hex
+        path = os.path.join(self.spool_dir, f"{job_id}.csv")
+        file.save(path)
+        job = UploadJob(job_id, file.filename or "upload.csv", path)
+        self._save(job)
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.history:
+                if not next(iter(self._jobs.values())).done:
+                    break
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> UploadJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        with self._record_sessions() as db:  # Queued by another worker process
+            record = db.get(UploadJobRecord, job_id)
+            return UploadJob.from_record(record) if record is not None else None
+
+    def _save(self, job: UploadJob) -> None:
+        with self._record_sessions() as db:
+            db.merge(job.to_record())
+            db.commit()
+
+    def _run(self, job: UploadJob) -> None:
+        from ingest import ingest_csv_stream, rows_per_second  # pandas loads with the first job, not at boot
+
+        job.status = "running"
+        job.started_at = time.time()
+        self._save(job)
+
+        def progress(rows: int, elapsed: float):
+            job.rows = rows
+            job.rows_per_sec = rows_per_second(rows, elapsed)
+            self._save(job)
+
+        try:
+            with open(job.path, "rb") as fh, self.session_factory() as db:
+                ingest_csv_stream(db, fh, chunk_rows=self.chunk_rows, chunk_size=self.chunk_size, on_progress=progress)
+            job.status = "done"
+            if self.metrics is not None:
+                self.metrics.record_upload("background", job.rows, time.time() - job.started_at)
+        except Exception as exc:  # reported through the job status endpoint
+            job.errors.append(str(exc))
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            self.session_factory.remove()
+            bump_dataset_version(self._record_sessions)
+            if self.after_ingest is not None:
+                self.after_ingest()
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+            self._save(job)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
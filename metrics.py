@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import disable_created_metrics, multiprocess
+from sqlalchemy import event
+
+# Histogram bucket upper bounds; +Inf is implied
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+ROWS_PER_SECOND_BUCKETS = (1e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5, 5e5, 1e6)
+
+disable_created_metrics()  # No *_created series next to every counter and histogram
+
+
+def multiprocess_mode() -> bool:
+    """True when prometheus_client keeps samples in PROMETHEUS_MULTIPROC_DIR, shared by all workers"""
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+class AppMetrics:
+    """Request, SQL and upload metrics, rendered as Prometheus text.
+
+    Samples go to prometheus_client metrics. With PROMETHEUS_MULTIPROC_DIR
+    set to one directory shared by every worker (emptied before the server
+    starts), each worker writes its samples there and ``render`` merges
+    them all, so whichever worker answers the scrape reports the whole
+    server. Without it, only the answering process is reported, which is
+    right for a single worker. ``collectors`` return point-in-time values
+    as ``(name, type, help, value)`` tuples (cache counters). Counters are
+    fed into prometheus_client as increments and gauges are summed over
+    live workers. They are refreshed after every request and on render.
+    """
+
+    def __init__(self, slow_query_ms: float = 0, logger=None):
+        self.slow_query_ms = slow_query_ms
+        self.logger = logger
+        self.registry = CollectorRegistry()
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "Time to serve a request, including streamed bodies",
+            ("endpoint", "method", "status"), buckets=DURATION_BUCKETS, registry=self.registry,
+        )
+        self.request_statements = Histogram(
+            "http_request_sql_statements", "SQL statements issued per request", ("endpoint",),
+            buckets=STATEMENT_BUCKETS, registry=self.registry,
+        )
+        self.request_sql_seconds = Histogram(
+            "http_request_sql_duration_seconds", "Time spent in SQL per request", ("endpoint",),
+            buckets=DURATION_BUCKETS, registry=self.registry,
+        )
+        self.query_seconds = Histogram(
+            "db_query_duration_seconds", "Duration of each SQL statement", ("engine",),
+            buckets=DURATION_BUCKETS, registry=self.registry,
+        )
+        self.upload_rows_per_second = Histogram(
+            "upload_rows_per_second", "Ingest throughput of finished uploads", ("mode",),
+            buckets=ROWS_PER_SECOND_BUCKETS, registry=self.registry,
+        )
+        self.upload_rows = Histogram(
+            "upload_rows", "Rows loaded per upload", ("mode",),
+            buckets=(1e3, 1e4, 1e5, 1e6, 1e7), registry=self.registry,
+        )
+        self.collectors = []
+        self._collected = {}  # name -> (prometheus_client metric, last value seen from this process)
+        self._collect_lock = threading.Lock()
+
+    def record_upload(self, mode: str, rows: int, elapsed: float) -> None:
+        if elapsed > 0:
+            self.upload_rows_per_second.labels(mode).observe(rows / elapsed)
+        self.upload_rows.labels(mode).observe(rows)
+
+    def instrument_app(self, app) -> None:
+        """Time every request; streamed responses are measured when their body closes"""
+
+        @app.before_request
+        def start_request_timer():
+            g.request_metrics = {"started": time.perf_counter(), "statements": 0, "sql_seconds": 0.0}
+
+        @app.after_request
+        def record_request(response):
+            stats = g.get("request_metrics")
+            if stats is None:
+                return response
+            endpoint = request.endpoint or "unmatched"
+            labels = (endpoint, request.method, str(response.status_code))
+
+            def observe():
+                self.request_seconds.labels(*labels).observe(time.perf_counter() - stats["started"])
+                self.request_statements.labels(endpoint).observe(stats["statements"])
+                self.request_sql_seconds.labels(endpoint).observe(stats["sql_seconds"])
+                self.collect()
+
+            response.call_on_close(observe)
+            return response
+
+    def instrument_engine(self, engine, name: str) -> None:
+        """Time each statement on ``engine`` and add it to the current request's totals"""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def record_query(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["query_started"].pop()
+            self.query_seconds.labels(name).observe(elapsed)
+            if has_request_context():
+                stats = g.get("request_metrics")
+                if stats is not None:
+                    stats["statements"] += 1
+                    stats["sql_seconds"] += elapsed
+            if self.slow_query_ms and elapsed * 1000 >= self.slow_query_ms and self.logger is not None:
+                self.logger.warning(
+                    "Slow query (%.1f ms on %s): %s", elapsed * 1000, name, " ".join(statement.split())[:1000]
+                )
+
+        @event.listens_for(engine, "handle_error")
+        def drop_query_timer(context):
+            # A failed statement never reaches after_cursor_execute
+            started = context.connection.info.get("query_started") if context.connection is not None else None
+            if started:
+                started.pop()
+
+    def collect(self) -> None:
+        """Copy the ``collectors`` values into prometheus_client metrics"""
+        with self._collect_lock:
+            for collect in self.collectors:
+                for name, kind, help, value in collect():
+                    if name not in self._collected:
+                        if kind == "counter":
+                            metric = Counter(name.removesuffix("_total"), help, registry=self.registry)
+                        else:
+                            metric = Gauge(name, help, multiprocess_mode="livesum", registry=self.registry)
+                        self._collected[name] = (metric, 0)
+                    metric, last = self._collected[name]
+                    if kind == "counter":
+                        if value > last:
+                            metric.inc(value - last)
+                    else:
+                        metric.set(value)
+                    self._collected[name] = (metric, value)
+
+    def render(self) -> bytes:
+        self.collect()
+        registry = self.registry
+        if multiprocess_mode():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+
+    content_type = CONTENT_TYPE_LATEST
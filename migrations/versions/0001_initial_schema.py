@@ -0,0 +1,66 @@
+"""Initial schema as previously created by create_all
+
+Tables that already exist are left alone, so databases created before
+migrations were introduced can simply run ``alembic upgrade head``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("email", sa.String(255), nullable=False, unique=True),
+            sa.Column("password_hash", sa.String(255), nullable=False),
+            sa.Column("role", sa.String(32)),
+        )
+    if "brands" not in existing:
+        op.create_table(
+            "brands",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("name", sa.String(100), nullable=False, unique=True),
+        )
+    if "phone_models" not in existing:
+        op.create_table(
+            "phone_models",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("brand_id", sa.Integer, sa.ForeignKey("brands.id"), nullable=False),
+            sa.Column("model_name", sa.String(150), nullable=False),
+            sa.Column("ram", sa.String(32)),
+            sa.Column("storage", sa.String(32)),
+            sa.Column("camera", sa.String(64)),
+            sa.Column("battery", sa.String(64)),
+            sa.Column("processor", sa.String(128)),
+            sa.Column("os", sa.String(64)),
+            sa.Column("display_size", sa.String(32)),
+            sa.Column("launch_year", sa.Integer),
+        )
+    if "sales" not in existing:
+        op.create_table(
+            "sales",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("model_id", sa.Integer, sa.ForeignKey("phone_models.id"), nullable=False),
+            sa.Column("units_sold", sa.Integer),
+            sa.Column("total_revenue", sa.Float),
+            sa.Column("average_price", sa.Float),
+            sa.Column("region", sa.String(100)),
+            sa.Column("channel", sa.String(50)),
+            sa.Column("year", sa.Integer),
+        )
+
+
+def downgrade() -> None:
+    for table in ("sales", "phone_models", "brands", "users"):
+        op.drop_table(table)
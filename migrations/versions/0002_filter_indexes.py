@@ -0,0 +1,53 @@
+"""Indexes for the dashboard filters and upload model lookups
+
+Duplicate (brand_id, model_name) rows are merged into the lowest id
+before the unique index is created.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("phone_models", "uq_phone_models_brand_model", ["brand_id", "model_name"], True),
+    ("phone_models", "ix_phone_models_model_name", ["model_name"], False),
+    ("sales", "ix_sales_model_year", ["model_id", "year", "region", "channel", "units_sold", "total_revenue"], False),
+    ("sales", "ix_sales_region_year", ["region", "year", "channel", "model_id", "units_sold", "total_revenue"], False),
+    ("sales", "ix_sales_channel_year", ["channel", "year", "region", "model_id", "units_sold", "total_revenue"], False),
+    ("sales", "ix_sales_year_region", ["year", "region", "channel", "model_id", "units_sold", "total_revenue"], False),
+    ("sales", "ix_sales_price", ["average_price", "model_id", "region", "year", "channel", "units_sold", "total_revenue"], False),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        UPDATE sales SET model_id = (
+            SELECT MIN(dup.id) FROM phone_models AS pm
+            JOIN phone_models AS dup ON dup.brand_id = pm.brand_id AND dup.model_name = pm.model_name
+            WHERE pm.id = sales.model_id
+        )
+        WHERE model_id NOT IN (SELECT MIN(id) FROM phone_models GROUP BY brand_id, model_name)
+        """
+    )
+    op.execute("DELETE FROM phone_models WHERE id NOT IN (SELECT MIN(id) FROM phone_models GROUP BY brand_id, model_name)")
+
+    for table, name, columns, unique in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade() -> None:
+    for table, name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,87 @@
+"""Sales rollup tables, backfilled from the existing sales
+
+Tables already created by create_all are kept; the backfill only runs
+while a rollup table is empty.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def _is_empty(table: str) -> bool:
+    return op.get_bind().execute(sa.text(f"SELECT 1 FROM {table} LIMIT 1")).first() is None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if "rollup_brand_region_year_channel" not in existing:
+        _create_brand_rollup()
+    if "rollup_model_year" not in existing:
+        _create_model_rollup()
+
+    if _is_empty("rollup_brand_region_year_channel"):
+        op.execute(
+            """
+            INSERT INTO rollup_brand_region_year_channel
+                (brand_id, region, year, channel, units_sold, total_revenue, sale_count)
+            SELECT pm.brand_id, COALESCE(s.region, ''), COALESCE(s.year, 0), COALESCE(s.channel, ''),
+                   SUM(s.units_sold), SUM(s.total_revenue), COUNT(*)
+            FROM sales AS s JOIN phone_models AS pm ON pm.id = s.model_id
+            GROUP BY pm.brand_id, COALESCE(s.region, ''), COALESCE(s.year, 0), COALESCE(s.channel, '')
+            """
+        )
+    if _is_empty("rollup_model_year"):
+        op.execute(
+            """
+            INSERT INTO rollup_model_year (model_id, year, units_sold, total_revenue, sale_count)
+            SELECT model_id, COALESCE(year, 0), SUM(units_sold), SUM(total_revenue), COUNT(*)
+            FROM sales
+            GROUP BY model_id, COALESCE(year, 0)
+            """
+        )
+
+
+def _create_brand_rollup() -> None:
+    op.create_table(
+        "rollup_brand_region_year_channel",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("brand_id", sa.Integer, sa.ForeignKey("brands.id"), nullable=False),
+        sa.Column("region", sa.String(100), nullable=False),
+        sa.Column("year", sa.Integer, nullable=False),
+        sa.Column("channel", sa.String(50), nullable=False),
+        sa.Column("units_sold", sa.Integer),
+        sa.Column("total_revenue", sa.Float),
+        sa.Column("sale_count", sa.Integer),
+    )
+    op.create_index(
+        "uq_rollup_brand_region_year_channel",
+        "rollup_brand_region_year_channel",
+        ["brand_id", "region", "year", "channel"],
+        unique=True,
+    )
+
+
+def _create_model_rollup() -> None:
+    op.create_table(
+        "rollup_model_year",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("model_id", sa.Integer, sa.ForeignKey("phone_models.id"), nullable=False),
+        sa.Column("year", sa.Integer, nullable=False),
+        sa.Column("units_sold", sa.Integer),
+        sa.Column("total_revenue", sa.Float),
+        sa.Column("sale_count", sa.Integer),
+    )
+    op.create_index("uq_rollup_model_year", "rollup_model_year", ["model_id", "year"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table("rollup_model_year")
+    op.drop_table("rollup_brand_region_year_channel")
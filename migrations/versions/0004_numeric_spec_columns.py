@@ -0,0 +1,84 @@
+"""Numeric spec columns on phone_models, backfilled from the text specs
+
+Columns already created by create_all are kept; every model is then
+re-parsed. The parser is a frozen copy of specs.parse_spec as of this
+revision, so later changes to the app can't change what this migration
+writes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ("ram_gb", sa.Integer),
+    ("storage_gb", sa.Integer),
+    ("battery_mah", sa.Integer),
+    ("camera_mp", sa.Integer),
+    ("display_in", sa.Float),
+]
+
+# Numeric column -> (source text column, multipliers for non-default units)
+SPEC_COLUMNS = {
+    "ram_gb": ("ram", {"TB": 1024}),
+    "storage_gb": ("storage", {"TB": 1024}),
+    "battery_mah": ("battery", {}),
+    "camera_mp": ("camera", {}),
+    "display_in": ("display_size", {}),
+}
+FLOAT_SPECS = {"display_in"}
+NUMBER = re.compile(r"(\d+(?:\.\d+)?)\s*([A-Za-z]*)")
+BATCH_SIZE = 5000
+
+
+def _parse(text, multipliers: dict, as_float: bool):
+    """First number in ``text`` scaled by its unit; None when there is none"""
+    match = NUMBER.search(text) if text is not None else None
+    if match is None:
+        return None
+    value = float(match.group(1)) * multipliers.get(match.group(2).upper(), 1)
+    return value if as_float else round(value)
+
+
+def upgrade() -> None:
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("phone_models")}
+    with op.batch_alter_table("phone_models") as batch:
+        for name, type_ in COLUMNS:
+            if name not in existing:
+                batch.add_column(sa.Column(name, type_, nullable=True))
+
+    bind = op.get_bind()
+    sources = [source for source, _ in SPEC_COLUMNS.values()]
+    rows = bind.execute(sa.text(f"SELECT id, {', '.join(sources)} FROM phone_models")).all()
+    records = [
+        {
+            "_id": row[0],
+            **{
+                column: _parse(row[1 + index], multipliers, column in FLOAT_SPECS)
+                for index, (column, (_, multipliers)) in enumerate(SPEC_COLUMNS.items())
+            },
+        }
+        for row in rows
+    ]
+    statement = sa.text(
+        "UPDATE phone_models SET "
+        + ", ".join(f"{column} = :{column}" for column in SPEC_COLUMNS)
+        + " WHERE id = :_id"
+    )
+    for start in range(0, len(records), BATCH_SIZE):
+        bind.execute(statement, records[start:start + BATCH_SIZE])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("phone_models") as batch:
+        for name, _ in reversed(COLUMNS):
+            batch.drop_column(name)
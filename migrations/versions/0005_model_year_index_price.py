@@ -0,0 +1,27 @@
+"""Add average_price to ix_sales_model_year
+
+The scatter, sample, histogram and correlation queries read the price of
+every matching sale; with it in the index they no longer visit the table.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+OLD_COLUMNS = ["model_id", "year", "region", "channel", "units_sold", "total_revenue"]
+
+
+def upgrade() -> None:
+    op.drop_index("ix_sales_model_year", table_name="sales")
+    op.create_index("ix_sales_model_year", "sales", OLD_COLUMNS + ["average_price"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sales_model_year", table_name="sales")
+    op.create_index("ix_sales_model_year", "sales", OLD_COLUMNS)
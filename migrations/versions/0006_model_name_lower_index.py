@@ -0,0 +1,24 @@
+"""Expression index on lower(model_name) for the model typeahead
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Expression indexes are not reflected on every backend, so let the database skip it
+    op.create_index(
+        "ix_phone_models_model_name_lower", "phone_models", [sa.text("lower(model_name)")], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_phone_models_model_name_lower", table_name="phone_models")
@@ -0,0 +1,34 @@
+"""Background upload job status, readable from every worker
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "upload_jobs" in sa.inspect(op.get_bind()).get_table_names():
+        return  # Already created by `flask init-db`
+    op.create_table(
+        "upload_jobs",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("rows", sa.Integer),
+        sa.Column("rows_per_sec", sa.Float),
+        sa.Column("errors", sa.Text),
+        sa.Column("created_at", sa.Float, nullable=False),
+        sa.Column("started_at", sa.Float),
+        sa.Column("finished_at", sa.Float),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("upload_jobs")
@@ -0,0 +1,28 @@
+"""Shared dataset version, so every worker notices uploads made by the others
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "dataset_state" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "dataset_state",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("version", sa.Integer, nullable=False),
+        )
+    if op.get_bind().execute(sa.text("SELECT 1 FROM dataset_state WHERE id = 1")).first() is None:
+        op.execute("INSERT INTO dataset_state (id, version) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table("dataset_state")
@@ -0,0 +1,26 @@
+"""Shared users version, so role changes reach every worker's user cache
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("dataset_state")}
+    if "users_version" in columns:
+        return  # Already created by `flask init-db`
+    with op.batch_alter_table("dataset_state") as batch:
+        batch.add_column(sa.Column("users_version", sa.Integer, nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("dataset_state") as batch:
+        batch.drop_column("users_version")
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column
-from sqlalchemy import Integer, String, ForeignKey, Float, Text
+from sqlalchemy import Integer, String, ForeignKey, Float, Text, Index, text
 from flask_login import UserMixin
 
 Base = declarative_base()
@@ -22,6 +22,13 @@ class Brand(Base):
 
 class PhoneModel(Base):
     __tablename__ = "phone_models"
+    __table_args__ = (
+        # Upload resolves models by (brand, name); one row per pair
+        Index("uq_phone_models_brand_model", "brand_id", "model_name", unique=True),
+        Index("ix_phone_models_model_name", "model_name"),
+        # Case-insensitive model typeahead (aggregations.model_options)
+        Index("ix_phone_models_model_name_lower", text("lower(model_name)")),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     brand_id: Mapped[int] = mapped_column(ForeignKey("brands.id"), nullable=False)
     model_name: Mapped[str] = mapped_column(String(150), nullable=False)
@@ -33,6 +40,12 @@ class PhoneModel(Base):
     os: Mapped[str] = mapped_column(String(64))
     display_size: Mapped[str] = mapped_column(String(32))
     launch_year: Mapped[int] = mapped_column(Integer)
+    # Numeric specs parsed once at ingest (see specs.py)
+    ram_gb: Mapped[int | None] = mapped_column(Integer)
+    storage_gb: Mapped[int | None] = mapped_column(Integer)
+    battery_mah: Mapped[int | None] = mapped_column(Integer)
+    camera_mp: Mapped[int | None] = mapped_column(Integer)
+    display_in: Mapped[float | None] = mapped_column(Float)
 
     brand = relationship("Brand", back_populates="models")
     sales = relationship("Sale", back_populates="phone_model")
@@ -40,6 +53,20 @@ class PhoneModel(Base):
 
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        # Every dashboard query joins through model_id and sums units/revenue,
+        # so each index also carries those columns and can answer the
+        # aggregates without touching the table.
+        # Brand/model filters arrive through the phone_models join
+        # average_price too, so per-sale point/correlation scans stay on the index
+        Index(
+            "ix_sales_model_year", "model_id", "year", "region", "channel", "units_sold", "total_revenue", "average_price"
+        ),
+        Index("ix_sales_region_year", "region", "year", "channel", "model_id", "units_sold", "total_revenue"),
+        Index("ix_sales_channel_year", "channel", "year", "region", "model_id", "units_sold", "total_revenue"),
+        Index("ix_sales_year_region", "year", "region", "channel", "model_id", "units_sold", "total_revenue"),
+        Index("ix_sales_price", "average_price", "model_id", "region", "year", "channel", "units_sold", "total_revenue"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     model_id: Mapped[int] = mapped_column(ForeignKey("phone_models.id"), nullable=False)
     units_sold: Mapped[int] = mapped_column(Integer, default=0)
@@ -52,3 +79,56 @@ class Sale(Base):
     phone_model = relationship("PhoneModel", back_populates="sales")
 
 
+class BrandSalesRollup(Base):
+    """Sales pre-aggregated by brand, region, year and channel; maintained on ingest"""
+    __tablename__ = "rollup_brand_region_year_channel"
+    __table_args__ = (
+        Index("uq_rollup_brand_region_year_channel", "brand_id", "region", "year", "channel", unique=True),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    brand_id: Mapped[int] = mapped_column(ForeignKey("brands.id"), nullable=False)
+    region: Mapped[str] = mapped_column(String(100), nullable=False, default="")
+    year: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    channel: Mapped[str] = mapped_column(String(50), nullable=False, default="")
+    units_sold: Mapped[int] = mapped_column(Integer, default=0)
+    total_revenue: Mapped[float] = mapped_column(Float, default=0.0)
+    sale_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class ModelSalesRollup(Base):
+    """Sales pre-aggregated by phone model and year; maintained on ingest"""
+    __tablename__ = "rollup_model_year"
+    __table_args__ = (
+        Index("uq_rollup_model_year", "model_id", "year", unique=True),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    model_id: Mapped[int] = mapped_column(ForeignKey("phone_models.id"), nullable=False)
+    year: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    units_sold: Mapped[int] = mapped_column(Integer, default=0)
+    total_revenue: Mapped[float] = mapped_column(Float, default=0.0)
+    sale_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class UploadJobRecord(Base):
+    """Status of a background upload, shared by every worker that may be polled for it"""
+    __tablename__ = "upload_jobs"
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)  # queued/running/done/failed
+    rows: Mapped[int] = mapped_column(Integer, default=0)
+    rows_per_sec: Mapped[float] = mapped_column(Float, default=0.0)
+    errors: Mapped[str] = mapped_column(Text, default="")  # One message per line
+    created_at: Mapped[float] = mapped_column(Float, nullable=False)  # Unix timestamps, as in the status JSON
+    started_at: Mapped[float | None] = mapped_column(Float)
+    finished_at: Mapped[float | None] = mapped_column(Float)
+
+
+class DatasetState(Base):
+    """Single row (id 1) whose version is bumped after every upload; see cache.sync_dataset_version.
+
+    users_version is bumped after a role change; see cache.UserCache.sync.
+    """
+    __tablename__ = "dataset_state"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    users_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
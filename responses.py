@@ -0,0 +1,53 @@
+import functools
+import gzip
+import hashlib
+
+from flask import current_app, request
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Brotli's higher qualities cost far more CPU for a few percent
+
+
+@functools.cache
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def accepted_encoding() -> str | None:
+    """Best content coding the client accepts: ``br`` (when brotli is installed), ``gzip`` or None"""
+    available = ["br", "gzip"] if _brotli() is not None else ["gzip"]
+    return request.accept_encodings.best_match(available)
+
+
+def encode_body(body: bytes, encoding: str | None) -> bytes:
+    if encoding == "br":
+        return _brotli().compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)  # mtime=0: same bytes, same ETag
+    return body
+
+
+def json_response(body: bytes, encoding: str | None = None):
+    """JSON response for an already encoded body, answered with 304 when the client's ETag matches.
+
+    The ETag is a digest of the bytes sent, so it changes with the data and
+    the encoding and never outlives what it describes.
+    """
+    response = current_app.response_class(mimetype="application/json")
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    # Cacheable by the browser, but revalidated with If-None-Match every time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    if request.if_none_match.contains(etag):
+        response.status_code = 304
+        return response
+    response.set_data(body)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
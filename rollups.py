@@ -0,0 +1,147 @@
+import pandas as pd
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import BrandSalesRollup, ModelSalesRollup, PhoneModel, Sale
+
+# Rollup grain; NULL keys are stored as "" / 0 so the unique indexes hold
+ROLLUP_KEYS = {
+    BrandSalesRollup: ["brand_id", "region", "year", "channel"],
+    ModelSalesRollup: ["model_id", "year"],
+}
+
+MEASURES = ["units_sold", "total_revenue", "sale_count"]
+
+LOOKUP_BATCH = 500
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE, used so concurrent uploads
+# adding the same new key add up instead of colliding on the unique index
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+UPSERT_BATCH = 5000
+
+
+def _lookup_ids(db, rollup, key_columns: list, keys: list) -> dict:
+    columns = [getattr(rollup, name) for name in key_columns]
+    ids = {}
+    for start in range(0, len(keys), LOOKUP_BATCH):
+        batch = keys[start:start + LOOKUP_BATCH]
+        for row in db.query(rollup.id, *columns).filter(tuple_(*columns).in_(batch)):
+            ids[tuple(row[1:])] = row[0]
+    return ids
+
+
+def _upsert(db, rollup, deltas: pd.DataFrame) -> bool:
+    """Add ``deltas`` in one upsert per batch; False when the dialect has no upsert"""
+    dialect_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        return False
+    table = rollup.__table__
+    statement = dialect_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=ROLLUP_KEYS[rollup],
+        set_={name: table.c[name] + statement.excluded[name] for name in MEASURES},
+    )
+    records = deltas.to_dict("records")
+    for start in range(0, len(records), UPSERT_BATCH):
+        db.execute(statement, records[start:start + UPSERT_BATCH])
+    return True
+
+
+def _apply(db, rollup, deltas: pd.DataFrame) -> None:
+    if _upsert(db, rollup, deltas):
+        return
+    # Read-then-write fallback for other dialects; concurrent uploads adding the same key can collide
+    key_columns = ROLLUP_KEYS[rollup]
+    keys = list(deltas[key_columns].itertuples(index=False, name=None))
+    ids = _lookup_ids(db, rollup, key_columns, keys)
+
+    updates = []
+    inserts = []
+    for key, record in zip(keys, deltas.to_dict("records")):
+        if key in ids:
+            updates.append({
+                "_id": ids[key],
+                "_units": record["units_sold"],
+                "_revenue": record["total_revenue"],
+                "_count": record["sale_count"],
+            })
+        else:
+            inserts.append(record)
+
+    if updates:
+        table = rollup.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values(
+                units_sold=table.c.units_sold + bindparam("_units"),
+                total_revenue=table.c.total_revenue + bindparam("_revenue"),
+                sale_count=table.c.sale_count + bindparam("_count"),
+            ),
+            updates,
+        )
+    if inserts:
+        db.execute(insert(rollup), inserts)
+
+
+def apply_sales_deltas(db, sales: pd.DataFrame) -> None:
+    """Fold newly inserted sales into the rollup tables.
+
+    ``sales`` needs brand_id, model_id, region, year, channel, units_sold and
+    total_revenue columns. Runs in the caller's transaction, so the rollups
+    commit (or roll back) together with the sales themselves.
+    """
+    if sales.empty:
+        return
+    sales = sales.assign(
+        region=sales["region"].fillna("").astype(str),
+        channel=sales["channel"].fillna("").astype(str),
+        year=sales["year"].fillna(0).astype("int64"),
+    )
+    for rollup, key_columns in ROLLUP_KEYS.items():
+        deltas = (
+            sales.groupby(key_columns, sort=False)
+            .agg(
+                units_sold=("units_sold", "sum"),
+                total_revenue=("total_revenue", "sum"),
+                sale_count=("units_sold", "size"),
+            )
+            .reset_index()
+        )
+        _apply(db, rollup, deltas)
+
+
+def rebuild_rollups(db) -> None:
+    """Recompute both rollup tables from the raw sales table"""
+    db.execute(delete(BrandSalesRollup))
+    db.execute(delete(ModelSalesRollup))
+
+    region = func.coalesce(Sale.region, "")
+    year = func.coalesce(Sale.year, 0)
+    channel = func.coalesce(Sale.channel, "")
+    measures = [func.sum(Sale.units_sold), func.sum(Sale.total_revenue), func.count()]
+
+    brand_select = (
+        select(PhoneModel.brand_id, region, year, channel, *measures)
+        .join(PhoneModel, PhoneModel.id == Sale.model_id)
+        .group_by(PhoneModel.brand_id, region, year, channel)
+    )
+    db.execute(
+        insert(BrandSalesRollup.__table__).from_select(
+            ["brand_id", "region", "year", "channel", "units_sold", "total_revenue", "sale_count"], brand_select
+        )
+    )
+
+    model_select = select(Sale.model_id, year, *measures).group_by(Sale.model_id, year)
+    db.execute(
+        insert(ModelSalesRollup.__table__).from_select(
+            ["model_id", "year", "units_sold", "total_revenue", "sale_count"], model_select
+        )
+    )
+
+
+def rollups_stale(db) -> bool:
+    """True when sales exist but the rollups were never built (e.g. a pre-rollup database)"""
+    has_sales = db.query(Sale.id).limit(1).first() is not None
+    has_rollups = db.query(BrandSalesRollup.id).limit(1).first() is not None
+    return has_sales and not has_rollups
@@ -0,0 +1,64 @@
+import pandas as pd
+from sqlalchemy import bindparam, update
+
+from models import PhoneModel
+
+# Numeric column -> (source text column, multipliers for non-default units)
+SPEC_COLUMNS = {
+    "ram_gb": ("ram", {"TB": 1024}),
+    "storage_gb": ("storage", {"TB": 1024}),
+    "battery_mah": ("battery", {}),
+    "camera_mp": ("camera", {}),
+    "display_in": ("display_size", {}),
+}
+
+FLOAT_SPECS = {"display_in"}
+
+_NUMBER = r"(\d+(?:\.\d+)?)\s*([A-Za-z]*)"
+
+
+def parse_spec(series: pd.Series, multipliers: dict, as_float: bool = False) -> pd.Series:
+    """Vectorized parse of strings like "8GB", "1 TB", "5000mAh" or '6.7"'.
+
+    The first number in each value is taken; unparsable values become None.
+    """
+    parts = series.astype("string").str.extract(_NUMBER)
+    values = pd.to_numeric(parts[0], errors="coerce")
+    units = parts[1].str.upper()
+    for unit, factor in multipliers.items():
+        values = values.mask(units == unit, values * factor)
+    if not as_float:
+        values = values.round().astype("Int64")
+    return values.astype(object).where(values.notna(), None)
+
+
+def parse_specs(models: pd.DataFrame) -> pd.DataFrame:
+    """Numeric spec columns for a frame holding the PhoneModel text columns"""
+    parsed = {}
+    for column, (source, multipliers) in SPEC_COLUMNS.items():
+        if source in models.columns:
+            parsed[column] = parse_spec(models[source], multipliers, as_float=column in FLOAT_SPECS)
+        else:
+            parsed[column] = pd.Series(None, index=models.index, dtype=object)
+    return pd.DataFrame(parsed, index=models.index)
+
+
+def backfill_spec_columns(db, batch_size: int = 5000) -> int:
+    """Re-derive the numeric spec columns of every phone model; returns models updated"""
+    text_columns = ["id"] + [source for source, _ in SPEC_COLUMNS.values()]
+    models = pd.DataFrame(
+        db.query(*(getattr(PhoneModel, name) for name in text_columns)).all(),
+        columns=text_columns,
+    )
+    if models.empty:
+        return 0
+    records = parse_specs(models).assign(_id=models["id"]).to_dict("records")
+    table = PhoneModel.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values({column: bindparam(column) for column in SPEC_COLUMNS})
+    )
+    for start in range(0, len(records), batch_size):
+        db.execute(statement, records[start:start + batch_size])
+    return len(records)